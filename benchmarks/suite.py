@@ -0,0 +1,277 @@
+# benchmarks/suite.py
+#
+# Reproducible benchmarks for the serving hot paths.
+#
+# For each dataset size, a synthetic dataset is generated with
+# generatedData/generate_dataset.py (fixed seed) and a fresh interpreter
+# times, through the Flask test client and direct calls:
+#
+#   import             importing the API and USSD modules (dataset + model load)
+#   get_features       USSD feature lookup
+#   predict_best_time  USSD prediction for one hospital/department/date
+#   predict_*          single-row POST /predict_regression, /predict_classification
+#   predict_*_batch    POST /predict_*/batch at each batch size
+#   ussd_session       a full /ussd hop sequence, language to answer
+#
+# Each path reports p50/p95/p99 latency, throughput and the process's peak
+# RSS so far. Results are written as JSON together with the git commit, so
+# runs can be compared between commits:
+#
+#     python benchmarks/suite.py --scales 1,4 --batch-sizes 1,32,256
+#     python benchmarks/suite.py --compare before.json after.json
+#
+# The response cache is off unless --cache is given, so repeated inputs
+# measure the models rather than the cache.
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+SEED = 1234
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def measure(fn, iterations, warmup=3, items=1):
+    """Time ``iterations`` calls of ``fn``; a falsy return or an exception counts as an error.
+
+    ``items`` is how many rows one call handles, for the throughput figure.
+    """
+    for _ in range(warmup):
+        try:
+            fn()
+        except Exception:
+            pass
+
+    timings, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            ok = fn()
+        except Exception:
+            ok = False
+        timings.append(time.perf_counter() - start)
+        errors += not ok
+    elapsed = time.perf_counter() - started
+
+    return {
+        'calls': iterations,
+        'errors': errors,
+        'p50_ms': percentile(timings, 50) * 1e3,
+        'p95_ms': percentile(timings, 95) * 1e3,
+        'p99_ms': percentile(timings, 99) * 1e3,
+        'mean_ms': sum(timings) / len(timings) * 1e3,
+        'throughput_per_s': iterations * items / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_worker(iterations, batch_sizes):
+    """Benchmark every path in this process; the dataset comes from WAPI_DATASET_CSV/PARQUET."""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    from src.api.app import app
+    from src.api.model_registry import preload
+    from src.ussd import ussd_app
+    preload()
+    results['import'] = {
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_added_mb': peak_rss_mb() - baseline,
+        'dataset_rows': len(ussd_app.df),
+    }
+
+    client = app.test_client()
+    rng = random.Random(SEED)
+    df = ussd_app.df
+    columns = ussd_app.frozen_preprocessor().columns
+    rows = json.loads(df[columns].sample(n=min(len(df), max(batch_sizes + [256])), random_state=SEED)
+                      .to_json(orient='values'))
+    keys = list(ussd_app.FEATURE_INDEX)
+
+    def random_key():
+        hospital, department, date_str, time_block = rng.choice(keys)
+        return hospital, department, datetime.strptime(date_str, '%Y-%m-%d'), time_block
+
+    def post(url, payload):
+        return lambda: client.post(url, json=payload()).status_code < 400
+
+    results['get_features'] = measure(lambda: ussd_app.get_features(*random_key()) is not None, iterations * 10)
+    results['predict_best_time'] = measure(
+        lambda: ussd_app.predict_best_time(*random_key()[:3]) is not None, iterations)
+
+    for kind in ['regression', 'classification']:
+        results[f'predict_{kind}'] = measure(
+            post(f'/predict_{kind}', lambda: {'features': rng.choice(rows)}), iterations)
+        for size in batch_sizes:
+            results[f'predict_{kind}_batch[{size}]'] = measure(
+                post(f'/predict_{kind}/batch', lambda: {'features': rng.sample(rows, size)}),
+                max(iterations // max(size // 32, 1), 5), items=size)
+
+    hospitals = {name: i + 1 for i, name in enumerate(ussd_app.HOSPITALS)}
+    departments = {name: i + 1 for i, name in enumerate(ussd_app.DEPARTMENTS)}
+    session_counter = iter(range(10 ** 9))
+
+    def ussd_session():
+        hospital, department, date_obj, _ = random_key()
+        chain = ['1', '1', str(hospitals[hospital]), str(departments[department]), '4', date_obj.strftime('%Y-%m-%d')]
+        session_id = f"bench-{next(session_counter)}"
+        reply = ''
+        for hop in range(len(chain) + 1):
+            reply = client.post('/ussd', data={
+                'sessionId': session_id, 'phoneNumber': '+254700000000', 'text': '*'.join(chain[:hop]),
+            }).get_data(as_text=True)
+        return reply.startswith('END') and 'Time:' in reply
+
+    results['ussd_session'] = measure(ussd_session, iterations)
+    return results
+
+
+def generate_dataset(directory, scale, file_format):
+    sys.path.insert(0, os.path.join(ROOT, 'generatedData'))
+    from generate_dataset import generate
+
+    csv_path = os.path.join(directory, f'dataset-x{scale}.csv')
+    rows = generate(csv_path, scale=scale, seed=SEED)
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    if file_format == 'parquet':
+        from src.dataset import convert_csv
+        convert_csv(csv_path, parquet_path)
+    return csv_path, parquet_path, rows
+
+
+def git_info():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def run_suite(args):
+    sys.path.insert(0, ROOT)
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='wapi-bench-') as directory:
+        for scale in args.scales:
+            csv_path, parquet_path, rows = generate_dataset(directory, scale, args.format)
+            env = dict(os.environ, WAPI_DATASET_CSV=csv_path, WAPI_DATASET_PARQUET=parquet_path)
+            if not args.cache:
+                env['RESPONSE_CACHE_SIZE'] = '0'
+            command = [sys.executable, os.path.abspath(__file__), '--worker',
+                       '--iterations', str(args.iterations),
+                       '--batch-sizes', ','.join(map(str, args.batch_sizes))]
+            print(f"Benchmarking {rows:,} rows (scale {scale})...", file=sys.stderr)
+            output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+            if output.returncode != 0:
+                sys.exit(f"Benchmark worker failed:\n{output.stderr}")
+            runs.append({'scale': scale, 'dataset_rows': rows,
+                         'results': json.loads(output.stdout.strip().splitlines()[-1])})
+
+    return {
+        'meta': {
+            **git_info(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'format': args.format,
+            'iterations': args.iterations,
+            'batch_sizes': args.batch_sizes,
+            'cache': args.cache,
+        },
+        'runs': runs,
+    }
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"commit {meta['commit']}{' (dirty)' if meta['dirty'] else ''}  {meta['timestamp']}")
+    for run in report['runs']:
+        imported = run['results']['import']
+        print(f"\n{run['dataset_rows']:,} rows: import {imported['seconds']:.2f}s, "
+              f"+{imported['rss_added_mb']:.0f} MB RSS")
+        print(f"{'path':<36}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'per s':>11}{'errors':>8}{'RSS MB':>8}")
+        for path, r in run['results'].items():
+            if path == 'import':
+                continue
+            print(f"{path:<36}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                  f"{r['throughput_per_s']:>11.1f}{r['errors']:>8}{r['peak_rss_mb']:>8.0f}")
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"before {before['meta']['commit']}  after {after['meta']['commit']}")
+    previous = {run['dataset_rows']: run['results'] for run in before['runs']}
+    for run in after['runs']:
+        old = previous.get(run['dataset_rows'])
+        if old is None:
+            continue
+        print(f"\n{run['dataset_rows']:,} rows")
+        print(f"{'path':<36}{'p50 before':>11}{'p50 after':>11}{'change':>9}")
+        for path, r in run['results'].items():
+            if path == 'import' or path not in old:
+                continue
+            change = (r['p50_ms'] - old[path]['p50_ms']) / old[path]['p50_ms'] * 100 if old[path]['p50_ms'] else 0.0
+            print(f"{path:<36}{old[path]['p50_ms']:>11.2f}{r['p50_ms']:>11.2f}{change:>8.0f}%")
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Wapi Daktari serving paths.")
+    parser.add_argument('--scales', type=_int_list, default=[1],
+                        help="Dataset sizes as copies of each hospital (1 = 27k rows)")
+    parser.add_argument('--batch-sizes', type=_int_list, default=[1, 32, 256])
+    parser.add_argument('--iterations', type=int, default=200, help="Calls per path")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help="Dataset format the modules load at import")
+    parser.add_argument('--cache', action='store_true', help="Keep the response cache on")
+    parser.add_argument('--output', help="JSON results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="Compare two results files")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    elif args.worker:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_worker(args.iterations, args.batch_sizes)))
+    else:
+        report = run_suite(args)
+        print_report(report)
+        output = args.output
+        if output is None:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            output = os.path.join(RESULTS_DIR, f"{(report['meta']['commit'] or 'unknown')[:10]}-{stamp}.json")
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {output}")
@@ -0,0 +1,61 @@
+# benchmarks/ussd_hops.py
+#
+# Per-hop latency of the USSD handler, called directly (no HTTP).
+#
+# Walks simulated sessions through every screen - language, main menu,
+# hospital, department, date menu and the answer for a date in the dataset -
+# and reports the median and p95 handler time for each hop.
+#
+#     python benchmarks/ussd_hops.py --sessions 2000
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+HOPS = [
+    ('language', ''),
+    ('main menu', '1'),
+    ('hospital menu', '1*1'),
+    ('department menu', '1*1*{h}'),
+    ('date menu', '1*1*{h}*{d}'),
+    ('enter date', '1*1*{h}*{d}*4'),
+    ('answer', '1*1*{h}*{d}*4*{date}'),
+]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run(sessions, date):
+    # Import here so module start-up (dataset, models) is not part of any hop
+    from src.ussd.ussd_app import handle_ussd
+
+    timings = {name: [] for name, _ in HOPS}
+    for i in range(sessions):
+        fields = {'h': i % 5 + 1, 'd': i // 5 % 5 + 1, 'date': date}
+        for name, template in HOPS:
+            text = template.format(**fields)
+            start = time.perf_counter()
+            handle_ussd(f"bench-{i}", '+254700000000', text)
+            timings[name].append(time.perf_counter() - start)
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure USSD handler latency per hop.")
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--date', default='2025-03-03', help="Date in the dataset to ask about")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    timings = run(args.sessions, args.date)
+
+    print(f"{'hop':<18}{'p50 (us)':>10}{'p95 (us)':>10}")
+    for name, values in timings.items():
+        print(f"{name:<18}{percentile(values, 50) * 1e6:>10.1f}{percentile(values, 95) * 1e6:>10.1f}")
@@ -0,0 +1,347 @@
+# benchmarks/ussd_simulator.py
+#
+# Local USSD gateway simulator and load generator.
+#
+# Plays the telco gateway against /ussd: every hop is a form-encoded POST of
+# sessionId, phoneNumber and the whole input chain so far in text
+# ("1*1*98*7*2"), exactly as the gateway sends it. Each simulated user picks
+# a language, reads the options on every screen, sometimes pages on with 98
+# or goes back with 0, and ends on an answer - a date from the date menu or a
+# typed date, now and then mistyped. Users think between hops, and many
+# sessions run at once.
+#
+# Every hop is timed against the gateway's per-hop budget. A session counts
+# as dropped when a hop goes over that budget, fails, or the session outlives
+# the gateway's session lifetime; the gateway would have cut the user off.
+# Dropped sessions, and sessions the app ended without an answer (rejected
+# input or an error reply), are all failures: the headline counts them and
+# the exit status is 1 when there are any.
+#
+#     python benchmarks/ussd_simulator.py --url http://localhost:8000/ussd --concurrency 50 --sessions 2000
+#     python benchmarks/ussd_simulator.py --in-process --think-time 0 --sessions 500
+#
+# --in-process drives the Flask app through its test client instead of HTTP,
+# so no server is needed (the dataset and models load in this process).
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Gateway limits; change them to match the provider
+HOP_BUDGET_MS = 5000
+SESSION_BUDGET_S = 180
+
+# What simulated users do, per screen
+SWAHILI_SHARE = 0.4
+LANGUAGE_TOGGLE_RATE = 0.05
+MORE_RATE = 0.25
+BACK_RATE = 0.1
+TYPED_DATE_RATE = 0.5
+TYPO_RATE = 0.05
+
+# Outcomes that left the user without an answer
+DROPPED_OUTCOMES = ('timeout', 'error')
+FAILED_OUTCOMES = DROPPED_OUTCOMES + ('rejected input', 'ended with error')
+
+OPTION = re.compile(r'^(\d+)\. ', re.MULTILINE)
+QUOTED = re.compile(r"'[^']*'")
+MORE = '98'
+BACK = '0'
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def options(screen):
+    """The option numbers a user can pick on ``screen``, without More and Back."""
+    return [value for value in OPTION.findall(screen) if value not in (MORE, BACK)]
+
+
+class HttpTarget:
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+
+    def post(self, form):
+        body = urllib.parse.urlencode(form).encode()
+        request = urllib.request.Request(self.url, data=body, headers={
+            'Content-Type': 'application/x-www-form-urlencoded'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status, response.read().decode()
+
+
+class InProcessTarget:
+    def __init__(self):
+        from src.api.app import app
+        # /ussd imports its module on first use; keep that out of the first hop
+        import src.ussd.ussd_app  # noqa: F401
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, form):
+        # Test clients aren't shared between threads
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.post('/ussd', data=form)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class User:
+    """One simulated caller: decides each input from the screen in front of them."""
+
+    def __init__(self, rng, dates):
+        self.rng = rng
+        self.dates = dates
+        self.lang = '2' if rng.random() < SWAHILI_SHARE else '1'
+        self.toggled = False
+
+    def choose(self, screen, text, page):
+        """(hop name, input, next screen, next page) for the current ``screen`` showing ``text``."""
+        rng = self.rng
+        if screen == 'language':
+            return 'language', self.lang, 'main', 0
+
+        if screen == 'main':
+            if not self.toggled and rng.random() < LANGUAGE_TOGGLE_RATE:
+                self.toggled = True
+                return 'main', '2', 'main', 0
+            return 'main', '1', 'hospital', 0
+
+        if screen in ('hospital', 'department'):
+            previous = 'main' if screen == 'hospital' else 'hospital'
+            if f"{MORE}." in text and rng.random() < MORE_RATE:
+                return screen, MORE, screen, page + 1
+            if rng.random() < BACK_RATE:
+                return screen, BACK, (screen if page > 0 else previous), max(page - 1, 0)
+            following = 'department' if screen == 'hospital' else 'date'
+            return screen, rng.choice(options(text)), following, 0
+
+        if screen == 'date':
+            if rng.random() < BACK_RATE:
+                return 'date', BACK, 'department', 0
+            if rng.random() < TYPED_DATE_RATE:
+                return 'date', '4', 'enter_date', 0
+            return 'date', rng.choice(['1', '2', '3']), 'end', 0
+
+        if screen == 'enter_date':
+            if rng.random() < BACK_RATE:
+                return 'enter_date', BACK, 'date', 0
+            typed = rng.choice(self.dates).isoformat()
+            if rng.random() < TYPO_RATE:
+                typed = typed.replace('-', '/', 1)
+            return 'enter_date', typed, 'end', 0
+
+        raise ValueError(f"Unknown screen {screen!r}")
+
+
+def run_session(target, number, args, dates):
+    """Play one session; returns its (hop, latency) list, its outcome and why it failed, if it did."""
+    rng = random.Random(args.seed * 1_000_003 + number)
+    user = User(rng, dates)
+    form = {
+        'sessionId': f"sim-{args.seed}-{number}",
+        'phoneNumber': f"+2547{rng.randrange(10 ** 8):08d}",
+        'serviceCode': '*384*1#',
+    }
+    inputs = []
+    screen, page = 'language', 0
+    hops = []
+    started = time.perf_counter()
+    name = 'dial'
+
+    # Back-and-forth users could in principle wander forever; real ones give up
+    for _ in range(args.max_hops):
+        form['text'] = '*'.join(inputs)
+        hop_start = time.perf_counter()
+        try:
+            status, reply = target.post(form)
+            error = None if status == 200 else f"HTTP {status}"
+        except urllib.error.HTTPError as e:
+            reply, error = '', f"HTTP {e.code}"
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+            reply, error = '', type(getattr(e, 'reason', e)).__name__
+        latency = time.perf_counter() - hop_start
+
+        ended = reply.startswith('END')
+        hops.append(('answer' if ended else name, latency))
+        if error == 'TimeoutError' or latency * 1000 > args.hop_budget_ms:
+            return hops, 'timeout', 'hop over budget'
+        if error is not None:
+            return hops, 'error', error
+        if not reply.startswith(('CON', 'END')):
+            return hops, 'error', 'malformed reply'
+        if ended:
+            reason = None
+            if any(word in reply for word in ('Time:', 'Wakati:')):
+                outcome = 'answered'
+            elif any(word in reply for word in ('Invalid input', 'Ingizo batili')):
+                # The simulated user misread a screen; should stay at zero
+                outcome, reason = 'rejected input', 'rejected input'
+            else:
+                # The reply's message without its translated prefix and quoted values,
+                # so the same failure in either language counts once
+                message = reply[4:].split('\n')[0].partition(': ')[2] or reply[4:]
+                outcome, reason = 'ended with error', QUOTED.sub("'...'", message)[:120]
+            if time.perf_counter() - started > args.session_budget_s:
+                return hops, 'timeout', 'session over budget'
+            return hops, outcome, reason
+        if screen == 'end':
+            return hops, 'error', 'expected END'
+
+        name, value, screen, page = user.choose(screen, reply[4:], page)
+        inputs.append(value)
+        if args.think_time > 0:
+            time.sleep(rng.lognormvariate(math.log(args.think_time), 0.5))
+        if time.perf_counter() - started > args.session_budget_s:
+            return hops, 'timeout', 'session over budget'
+
+    return hops, 'abandoned', None
+
+
+def run(target, args):
+    start, end = args.dates
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    counter = iter(range(args.sessions))
+    counter_lock = threading.Lock()
+    results = []
+    results_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with counter_lock:
+                number = next(counter, None)
+            if number is None:
+                return
+            result = run_session(target, number, args, dates)
+            with results_lock:
+                results.append(result)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"ussd-sim-{i}") for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def summarize(results, elapsed, args):
+    by_hop = {}
+    outcomes = {}
+    drops = {}
+    failures = {}
+    for hops, outcome, reason in results:
+        for name, latency in hops:
+            by_hop.setdefault(name, []).append(latency)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        if outcome in DROPPED_OUTCOMES:
+            drops[reason] = drops.get(reason, 0) + 1
+        if outcome in FAILED_OUTCOMES:
+            failures[reason] = failures.get(reason, 0) + 1
+
+    budget = args.hop_budget_ms / 1000
+    hop_count = sum(len(hops) for hops, _, _ in results)
+    return {
+        'sessions': len(results),
+        'hops': hop_count,
+        'elapsed_s': elapsed,
+        'hops_per_s': hop_count / elapsed if elapsed else 0.0,
+        'dropped': sum(drops.values()),
+        'dropped_share': sum(drops.values()) / len(results) if results else 0.0,
+        'drop_reasons': drops,
+        'failed': sum(failures.values()),
+        'failed_share': sum(failures.values()) / len(results) if results else 0.0,
+        'failure_reasons': failures,
+        'outcomes': outcomes,
+        'hop_budget_ms': args.hop_budget_ms,
+        'per_hop': {
+            name: {
+                'count': len(values),
+                'p50_ms': percentile(values, 50) * 1e3,
+                'p95_ms': percentile(values, 95) * 1e3,
+                'p99_ms': percentile(values, 99) * 1e3,
+                'max_ms': max(values) * 1e3,
+                'over_budget': sum(1 for value in values if value > budget),
+            }
+            for name, values in by_hop.items()
+        },
+    }
+
+
+def print_report(summary):
+    print(f"{summary['sessions']:,} sessions, {summary['hops']:,} hops in {summary['elapsed_s']:.1f}s "
+          f"({summary['hops_per_s']:.1f} hops/s)")
+    print(f"{'hop':<14}{'count':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'> budget':>10}")
+    for name in ['dial', 'language', 'main', 'hospital', 'department', 'date', 'enter_date', 'answer']:
+        r = summary['per_hop'].get(name)
+        if r is None:
+            continue
+        print(f"{name:<14}{r['count']:>8}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['max_ms']:>9.1f}{r['over_budget']:>10}")
+    outcomes = ', '.join(f"{count} {outcome}" for outcome, count in sorted(summary['outcomes'].items()))
+    print(f"\nOutcomes: {outcomes}")
+    print(f"Dropped by the gateway ({summary['hop_budget_ms']:.0f} ms per hop): "
+          f"{summary['dropped']} ({summary['dropped_share']:.1%})"
+          + (f" - {summary['drop_reasons']}" if summary['drop_reasons'] else ""))
+    print(f"Failed (dropped, rejected input or ended with error): "
+          f"{summary['failed']} ({summary['failed_share']:.1%})")
+    for reason, count in sorted(summary['failure_reasons'].items(), key=lambda item: -item[1]):
+        print(f"  {count:>6}  {reason}")
+
+
+def _date_range(value):
+    start, _, end = value.partition(':')
+    return date.fromisoformat(start), date.fromisoformat(end or start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate USSD gateway traffic against /ussd.")
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument('--url', default='http://localhost:8000/ussd', help="USSD callback URL")
+    target_group.add_argument('--in-process', action='store_true', help="Call the Flask app directly")
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20, help="Sessions in progress at once")
+    parser.add_argument('--think-time', type=float, default=2.0,
+                        help="Median seconds a user spends on each screen (0 for none)")
+    parser.add_argument('--hop-budget-ms', type=float, default=HOP_BUDGET_MS,
+                        help="Gateway timeout for one hop")
+    parser.add_argument('--session-budget-s', type=float, default=SESSION_BUDGET_S,
+                        help="Gateway limit on a whole session")
+    parser.add_argument('--dates', type=_date_range, default=_date_range('2025-01-01:2025-12-31'),
+                        help="START:END range users type dates from (default: the sample dataset's year)")
+    parser.add_argument('--max-hops', type=int, default=30, help="Hops after which a user gives up")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Also write the summary as JSON")
+    args = parser.parse_args()
+
+    if args.in_process:
+        import logging
+        logging.disable(logging.CRITICAL)
+        target = InProcessTarget()
+    else:
+        target = HttpTarget(args.url, timeout=args.hop_budget_ms / 1000)
+
+    results, elapsed = run(target, args)
+    summary = summarize(results, elapsed, args)
+    print_report(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    if summary['failed']:
+        sys.exit(1)
@@ -1,9 +1,28 @@
-# data/generate_dataset.py
+# generatedData/generate_dataset.py
+#
+# Synthetic healthcare dataset generator.
+#
+# Every column is drawn as a NumPy array over the cartesian index
+# date x hospital x department x time_block, a chunk of dates at a time, and
+# each chunk is appended to the output CSV as soon as it is ready, so memory
+# stays flat however many hospitals and years are generated.
+#
+#     python generate_dataset.py
+#     python generate_dataset.py --start 2023-01-01 --end 2025-12-31 --scale 20 --output big.csv
+#
+# Very large datasets can be generated in parallel shards; each shard gets its
+# own file and an independent RNG stream, and a manifest lists them all:
+#
+#     python generate_dataset.py --scale 200 --shards 16 --workers 8 --output-dir shards/
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
-import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
+import pandas as pd
 
 # Define constants
 HOSPITALS = ['Mbagathi', 'KNH', 'Mama Lucy', 'Pumwani', 'Kenyatta']
@@ -12,243 +31,25 @@ TIME_BLOCKS = ['Morning', 'Afternoon', 'Evening']
 START_DATE = datetime(2025, 1, 1)
 END_DATE = datetime(2025, 12, 31)  # Extended to cover a full year
 
-# Helper function to generate dates
-def generate_dates(start_date, end_date):
-    dates = []
-    current_date = start_date
-    while current_date <= end_date:
-        dates.append(current_date)
-        current_date += timedelta(days=1)
-    return dates
-
-# Helper function to determine if a date is a weekend
-def is_weekend(date):
-    return date.weekday() >= 5
-
-# Helper function to determine if a date is a holiday
-def is_holiday(date):
-    holidays = [
-        datetime(2025, 1, 1),  # New Year's Day
-        datetime(2025, 4, 18),  # Easter
-        datetime(2025, 5, 1),  # Labor Day
-        datetime(2025, 6, 1),  # Madaraka Day
-        datetime(2025, 10, 20),  # Mashujaa Day
-        datetime(2025, 12, 12),  # Jamhuri Day
-        datetime(2025, 12, 25),  # Christmas Day
-        datetime(2025, 12, 26)   # Boxing Day
-    ]
-    return date in holidays
-
-# Helper function to determine if a date is a strike day
-def is_strike_day(date):
-    strike_days = [
-        datetime(2025, 2, 15),  # Example strike day
-        datetime(2025, 3, 20),  # Example strike day
-        datetime(2025, 11, 5)   # Example strike day
-    ]
-    return date in strike_days
-
-# Helper function to simulate doctor availability
-def simulate_doctor_availability(date, is_holiday, is_strike_day, hospital):
-    if is_holiday or is_strike_day:
-        return 0, 'No'
-    if hospital == 'Mbagathi' or hospital == 'Pumwani':  # Smaller hospitals
-        doctors_on_shift = random.randint(0, 3)
-    else:  # Larger hospitals
-        doctors_on_shift = random.randint(0, 5)
-    doctor_available = 'Yes' if doctors_on_shift > 0 else 'No'
-    return doctors_on_shift, doctor_available
-
-# Helper function to simulate patient traffic
-def simulate_patient_traffic(time_block, is_weekend, is_holiday, department, hospital):
-    base_patients = 50
-    if time_block == 'Morning':
-        base_patients += 20
-    if is_weekend:
-        base_patients -= 10
-    if is_holiday:
-        base_patients += 15
-    if department == 'Emergency':
-        base_patients += 10
-    if hospital == 'KNH' or hospital == 'Kenyatta':  # Larger hospitals
-        base_patients += 20
-    return base_patients + random.randint(-5, 5)
-
-# Helper function to simulate waiting time
-def simulate_waiting_time(doctors_on_shift, actual_patients):
-    if doctors_on_shift == 0:
-        return random.randint(90, 120)
-    else:
-        return random.randint(30, 60)
-
-# Helper function to simulate doctor arrival delay
-def simulate_doctor_arrival_delay():
-    return random.randint(0, 120)
-
-# Helper function to determine congestion level
-def determine_congestion_level(actual_patients):
-    if actual_patients < 50:
-        return 'Low'
-    elif actual_patients < 80:
-        return 'Medium'
-    else:
-        return 'High'
-
-# Helper function to simulate walk-in traffic
-def simulate_walk_in_traffic(time_block, is_weekend, is_holiday, month, hospital):
-    base_walk_ins = 50
-    if time_block == 'Morning':
-        base_walk_ins += 20
-    if is_weekend:
-        base_walk_ins -= 10
-    if is_holiday:
-        base_walk_ins += 15
-    if month in [1, 2, 12]:  # Flu season
-        base_walk_ins += 10
-    if hospital == 'KNH' or hospital == 'Kenyatta':  # Larger hospitals
-        base_walk_ins += 20
-    return base_walk_ins + random.randint(-5, 5)
-
-# Helper function to simulate emergencies
-def simulate_emergencies(month):
-    if month in [6, 7, 8]:  # Malaria season
-        return random.randint(5, 15)
-    else:
-        return random.randint(0, 5)
+SMALL_HOSPITALS = ['Mbagathi', 'Pumwani']  # fewer doctors on shift
+LARGE_HOSPITALS = ['KNH', 'Kenyatta']      # more patients and walk-ins
+
+# (month, day) so that multi-year ranges get the same holidays every year
+HOLIDAYS = [
+    (1, 1),    # New Year's Day
+    (4, 18),   # Easter
+    (5, 1),    # Labor Day
+    (6, 1),    # Madaraka Day
+    (10, 20),  # Mashujaa Day
+    (12, 12),  # Jamhuri Day
+    (12, 25),  # Christmas Day
+    (12, 26),  # Boxing Day
+]
+STRIKE_DAYS = [(2, 15), (3, 20), (11, 5)]  # Example strike days
 
-# Helper function to simulate seasonal illnesses
-def simulate_seasonal_illnesses(month):
-    if month in [1, 2, 12]:  # Flu season
-        return random.randint(5, 15)
-    else:
-        return random.randint(0, 5)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'wapi_daktari_healthcare_dataset.csv')
 
-# Helper function to simulate public holidays and events
-def simulate_public_holidays_events(date):
-    if is_holiday(date):
-        return random.randint(-20, -10)
-    else:
-        return 0
-
-# Generate dates
-dates = generate_dates(START_DATE, END_DATE)
-
-# Initialize the DataFrame
-data = []
-
-# Generate data for each date
-for date in dates:
-    for hospital in HOSPITALS:
-        for department in DEPARTMENTS:
-            for time_block in TIME_BLOCKS:
-                # Determine day of the week, weekend, holiday, and strike day
-                day_of_week = date.weekday()
-                is_weekend_flag = is_weekend(date)
-                is_holiday_flag = is_holiday(date)
-                is_strike_day_flag = is_strike_day(date)
-
-                # Simulate doctor availability
-                doctors_on_shift, doctor_available = simulate_doctor_availability(date, is_holiday_flag, is_strike_day_flag, hospital)
-
-                # Simulate patient traffic
-                expected_patients = simulate_patient_traffic(time_block, is_weekend_flag, is_holiday_flag, department, hospital)
-                actual_patients = expected_patients + random.randint(-5, 5)
-
-                # Simulate waiting time
-                waiting_time_minutes = simulate_waiting_time(doctors_on_shift, actual_patients)
-
-                # Simulate peak hour
-                peak_hour = random.choice(['Yes', 'No'])
-
-                # Simulate doctor arrival delay
-                doctor_arrival_delay = simulate_doctor_arrival_delay()
-
-                # Determine congestion level
-                congestion_level = determine_congestion_level(actual_patients)
-
-                # Simulate walk-in traffic
-                expected_walk_ins = simulate_walk_in_traffic(time_block, is_weekend_flag, is_holiday_flag, date.month, hospital)
-
-                # Simulate emergencies
-                emergencies = simulate_emergencies(date.month)
-
-                # Simulate seasonal illnesses
-                seasonal_illnesses = simulate_seasonal_illnesses(date.month)
-
-                # Simulate public holidays and events
-                public_holidays_events = simulate_public_holidays_events(date)
-
-                # Simulate additional time-based features
-                hour_of_day = date.hour
-                day_of_month = date.day
-                quarter = (date.month - 1) // 3 + 1
-                season = 'Spring' if date.month in [3, 4, 5] else 'Summer' if date.month in [6, 7, 8] else 'Autumn' if date.month in [9, 10, 11] else 'Winter'
-
-                # Simulate lag features
-                previous_day_patients = actual_patients - random.randint(0, 5)
-                previous_week_patients = actual_patients - random.randint(0, 10)
-                previous_month_patients = actual_patients - random.randint(0, 20)
-                previous_day_waiting_time = waiting_time_minutes - random.randint(0, 10)
-                previous_week_waiting_time = waiting_time_minutes - random.randint(0, 20)
-                previous_month_waiting_time = waiting_time_minutes - random.randint(0, 30)
-
-                # Simulate interaction features
-                doctor_patient_ratio = doctors_on_shift / actual_patients
-                doctors_on_shift_expected_patients = doctors_on_shift * expected_patients
-                
-                cong_num = {'Low': 0, 'Medium': 1, 'High': 2}[congestion_level]
-                doctor_patient_ratio_congestion_level = doctor_patient_ratio * cong_num
-
-                # Simulate seasonal features
-                current_month = date.month
-                flu_season    = 1 if current_month in [1, 2, 3] else 0
-                malaria_season= 1 if current_month in [6, 7, 8] else 0
-                
-                mon = date.month
-                if mon in [12,1,2]:    # Summer in Nairobi
-                    temperature = random.uniform(25.0, 35.0)
-                    humidity    = random.uniform(40.0, 80.0)
-                    rainfall    = random.uniform(0.0, 10.0)
-                elif mon in [3,4,5]:   # Long rains
-                    temperature = random.uniform(20.0, 30.0)
-                    humidity    = random.uniform(50.0, 90.0)
-                    rainfall    = random.uniform(5.0, 30.0)
-                elif mon in [6,7,8]:   # Cool dry
-                    temperature = random.uniform(15.0, 25.0)
-                    humidity    = random.uniform(30.0, 70.0)
-                    rainfall    = random.uniform(0.0, 5.0)
-                else:                  # Short rains
-                    temperature = random.uniform(18.0, 28.0)
-                    humidity    = random.uniform(45.0, 85.0)
-                    rainfall    = random.uniform(2.0, 25.0)
-
-                # Simulate holiday and event features
-                school_holidays = random.choice([0, 1])
-                national_events = random.choice([0, 1])
-
-                # Simulate historical trends
-                average_waiting_time_last_week = waiting_time_minutes - random.randint(0, 10)
-                average_patients_last_month = actual_patients - random.randint(0, 20)
-
-                # Append to data list
-                data.append([
-                    hospital, date, day_of_week, is_weekend_flag, is_holiday_flag,
-                    is_strike_day_flag, department, time_block, doctors_on_shift,
-                    expected_patients, actual_patients, waiting_time_minutes,
-                    peak_hour, doctor_available, doctor_arrival_delay, congestion_level,
-                    date.month, date.day, actual_patients / expected_patients,
-                    doctors_on_shift / actual_patients, is_holiday_flag * is_strike_day_flag,
-                    expected_walk_ins, emergencies, seasonal_illnesses, public_holidays_events,
-                    hour_of_day, day_of_month, quarter, season, previous_day_patients,
-                    previous_week_patients, previous_month_patients, temperature, humidity, rainfall,
-                    school_holidays, national_events, average_waiting_time_last_week, average_patients_last_month,
-                    previous_day_waiting_time, previous_week_waiting_time, previous_month_waiting_time,
-                    doctors_on_shift_expected_patients, doctor_patient_ratio_congestion_level,
-                    flu_season, malaria_season
-                ])
-
-# Convert to DataFrame
-columns = [
+COLUMNS = [
     'hospital_name', 'date', 'day_of_week', 'is_weekend', 'is_holiday',
     'is_strike_day', 'department', 'time_block', 'doctors_on_shift',
     'expected_patients', 'actual_patients', 'waiting_time_minutes',
@@ -263,6 +64,303 @@ columns = [
     'doctors_on_shift_expected_patients', 'doctor_patient_ratio_congestion_level',
     'flu_season', 'malaria_season'
 ]
-df = pd.DataFrame(data, columns=columns)
 
-df.to_csv('../data/wapi_daktari_healthcare_dataset.csv', index=False)
+# (temperature, humidity, rainfall) ranges per month
+WEATHER = {}
+for _month in [12, 1, 2]:    # Summer in Nairobi
+    WEATHER[_month] = ((25.0, 35.0), (40.0, 80.0), (0.0, 10.0))
+for _month in [3, 4, 5]:     # Long rains
+    WEATHER[_month] = ((20.0, 30.0), (50.0, 90.0), (5.0, 30.0))
+for _month in [6, 7, 8]:     # Cool dry
+    WEATHER[_month] = ((15.0, 25.0), (30.0, 70.0), (0.0, 5.0))
+for _month in [9, 10, 11]:   # Short rains
+    WEATHER[_month] = ((18.0, 28.0), (45.0, 85.0), (2.0, 25.0))
+
+
+def scaled_hospitals(hospitals, scale):
+    """Replicate each hospital ``scale`` times ('KNH', 'KNH 2', ...) for load-test datasets.
+
+    Returns (names, base names); the base name decides the hospital's size class.
+    """
+    if scale <= 1:
+        return list(hospitals), list(hospitals)
+    names, bases = [], []
+    for copy in range(scale):
+        for hospital in hospitals:
+            names.append(hospital if copy == 0 else f"{hospital} {copy + 1}")
+            bases.append(hospital)
+    return names, bases
+
+
+def _randint(rng, low, high, size):
+    # Inclusive on both ends, like random.randint
+    return rng.integers(low, high + 1, size)
+
+
+def _uniform_by_month(rng, month, which):
+    low = np.array([WEATHER[m][which][0] for m in range(1, 13)])[month - 1]
+    high = np.array([WEATHER[m][which][1] for m in range(1, 13)])[month - 1]
+    return rng.uniform(low, high)
+
+
+def generate_chunk(rng, dates, hospitals, departments, time_blocks=TIME_BLOCKS, base_names=None):
+    """Generate every row for ``dates`` x hospitals x departments x time_blocks as a DataFrame."""
+    base_names = base_names or hospitals
+    dates = pd.DatetimeIndex(dates)
+    n_d, n_h, n_dep, n_t = len(dates), len(hospitals), len(departments), len(time_blocks)
+    n = n_d * n_h * n_dep * n_t
+
+    # Cartesian index in the same order as nested date/hospital/department/time_block loops
+    d_idx = np.repeat(np.arange(n_d), n_h * n_dep * n_t)
+    h_idx = np.tile(np.repeat(np.arange(n_h), n_dep * n_t), n_d)
+    dep_idx = np.tile(np.repeat(np.arange(n_dep), n_t), n_d * n_h)
+    t_idx = np.tile(np.arange(n_t), n_d * n_h * n_dep)
+
+    date = dates[d_idx]
+    month = date.month.to_numpy()
+    day = date.day.to_numpy()
+    day_of_week = date.weekday.to_numpy()
+    hospital = np.array(hospitals, dtype=object)[h_idx]
+    base = np.array(base_names, dtype=object)[h_idx]
+    department = np.array(departments, dtype=object)[dep_idx]
+    time_block = np.array(time_blocks, dtype=object)[t_idx]
+
+    month_day = month * 100 + day
+    is_weekend = day_of_week >= 5
+    is_holiday = np.isin(month_day, [m * 100 + d for m, d in HOLIDAYS])
+    is_strike_day = np.isin(month_day, [m * 100 + d for m, d in STRIKE_DAYS])
+    is_morning = time_block == 'Morning'
+    is_large = np.isin(base, LARGE_HOSPITALS)
+    is_small = np.isin(base, SMALL_HOSPITALS)
+
+    # Doctor availability
+    doctors_on_shift = np.where(is_small, _randint(rng, 0, 3, n), _randint(rng, 0, 5, n))
+    doctors_on_shift[is_holiday | is_strike_day] = 0
+    doctor_available = np.where(doctors_on_shift > 0, 'Yes', 'No')
+
+    # Patient traffic
+    expected_patients = (50 + 20 * is_morning - 10 * is_weekend + 15 * is_holiday
+                         + 10 * (department == 'Emergency') + 20 * is_large + _randint(rng, -5, 5, n))
+    actual_patients = expected_patients + _randint(rng, -5, 5, n)
+
+    waiting_time_minutes = np.where(doctors_on_shift == 0, _randint(rng, 90, 120, n), _randint(rng, 30, 60, n))
+    peak_hour = np.where(rng.integers(0, 2, n) == 1, 'Yes', 'No')
+    doctor_arrival_delay = _randint(rng, 0, 120, n)
+
+    congestion_level = np.select([actual_patients < 50, actual_patients < 80], ['Low', 'Medium'], 'High')
+    cong_num = np.select([actual_patients < 50, actual_patients < 80], [0, 1], 2)
+
+    flu_months = np.isin(month, [1, 2, 12])
+    expected_walk_ins = (50 + 20 * is_morning - 10 * is_weekend + 15 * is_holiday
+                         + 10 * flu_months + 20 * is_large + _randint(rng, -5, 5, n))
+
+    malaria_months = np.isin(month, [6, 7, 8])
+    emergencies = np.where(malaria_months, _randint(rng, 5, 15, n), _randint(rng, 0, 5, n))
+    seasonal_illnesses = np.where(flu_months, _randint(rng, 5, 15, n), _randint(rng, 0, 5, n))
+    public_holidays_events = np.where(is_holiday, _randint(rng, -20, -10, n), 0)
+
+    season = np.select([np.isin(month, [3, 4, 5]), malaria_months, np.isin(month, [9, 10, 11])],
+                       ['Spring', 'Summer', 'Autumn'], 'Winter')
+
+    doctor_patient_ratio = doctors_on_shift / actual_patients
+
+    return pd.DataFrame({
+        'hospital_name': hospital,
+        'date': date.strftime('%Y-%m-%d'),
+        'day_of_week': day_of_week,
+        'is_weekend': is_weekend,
+        'is_holiday': is_holiday,
+        'is_strike_day': is_strike_day,
+        'department': department,
+        'time_block': time_block,
+        'doctors_on_shift': doctors_on_shift,
+        'expected_patients': expected_patients,
+        'actual_patients': actual_patients,
+        'waiting_time_minutes': waiting_time_minutes,
+        'peak_hour': peak_hour,
+        'doctor_available': doctor_available,
+        'doctor_arrival_delay': doctor_arrival_delay,
+        'congestion_level': congestion_level,
+        'month': month,
+        'day': day,
+        'patient_load_ratio': actual_patients / expected_patients,
+        'doctor_patient_ratio': doctor_patient_ratio,
+        'holiday_strike_interaction': (is_holiday & is_strike_day).astype(int),
+        'expected_walk_ins': expected_walk_ins,
+        'emergencies': emergencies,
+        'seasonal_illnesses': seasonal_illnesses,
+        'public_holidays_events': public_holidays_events,
+        'hour_of_day': 0,  # dates carry no time of day
+        'day_of_month': day,
+        'quarter': (month - 1) // 3 + 1,
+        'season': season,
+        'previous_day_patients': actual_patients - _randint(rng, 0, 5, n),
+        'previous_week_patients': actual_patients - _randint(rng, 0, 10, n),
+        'previous_month_patients': actual_patients - _randint(rng, 0, 20, n),
+        'temperature': _uniform_by_month(rng, month, 0),
+        'humidity': _uniform_by_month(rng, month, 1),
+        'rainfall': _uniform_by_month(rng, month, 2),
+        'school_holidays': rng.integers(0, 2, n),
+        'national_events': rng.integers(0, 2, n),
+        'average_waiting_time_last_week': waiting_time_minutes - _randint(rng, 0, 10, n),
+        'average_patients_last_month': actual_patients - _randint(rng, 0, 20, n),
+        'previous_day_waiting_time': waiting_time_minutes - _randint(rng, 0, 10, n),
+        'previous_week_waiting_time': waiting_time_minutes - _randint(rng, 0, 20, n),
+        'previous_month_waiting_time': waiting_time_minutes - _randint(rng, 0, 30, n),
+        'doctors_on_shift_expected_patients': doctors_on_shift * expected_patients,
+        'doctor_patient_ratio_congestion_level': doctor_patient_ratio * cong_num,
+        'flu_season': np.isin(month, [1, 2, 3]).astype(int),
+        'malaria_season': malaria_months.astype(int),
+    }, columns=COLUMNS)
+
+
+def iter_chunks(hospitals=HOSPITALS, departments=DEPARTMENTS, start_date=START_DATE, end_date=END_DATE,
+                scale=1, seed=None, chunk_days=31, rng=None, base_names=None):
+    """Yield the dataset as DataFrames of ``chunk_days`` dates each.
+
+    ``base_names`` gives the size class of already-expanded hospital names.
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    if base_names is not None:
+        names, bases = list(hospitals), list(base_names)
+    else:
+        names, bases = scaled_hospitals(hospitals, scale)
+    dates = pd.date_range(start_date, end_date, freq='D')
+    for i in range(0, len(dates), chunk_days):
+        yield generate_chunk(rng, dates[i:i + chunk_days], names, departments, TIME_BLOCKS, bases)
+
+
+def generate(output=DEFAULT_OUTPUT, file_format='csv', **kwargs):
+    """Stream the dataset to ``output`` chunk by chunk; returns the number of rows written."""
+    rows = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(iter_chunks(**kwargs)):
+            if file_format == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _split(items, parts):
+    # Contiguous, nearly equal slices; never more slices than items
+    return [list(part) for part in np.array_split(np.array(items, dtype=object), min(parts, len(items)))]
+
+
+def _generate_shard(task):
+    # Runs in a worker process
+    rng = np.random.default_rng(task.pop('seed_sequence'))
+    task['rows'] = generate(output=task['path'], file_format=task['format'], rng=rng,
+                            hospitals=task['hospitals'], base_names=task['base_names'],
+                            departments=task['departments'],
+                            start_date=task['start_date'], end_date=task['end_date'],
+                            chunk_days=task['chunk_days'])
+    return task
+
+
+def generate_sharded(output_dir, shards, workers=None, partition='date', file_format='csv',
+                     hospitals=HOSPITALS, departments=DEPARTMENTS, start_date=START_DATE, end_date=END_DATE,
+                     scale=1, seed=None, chunk_days=31):
+    """Generate the dataset as ``shards`` files in parallel and write ``manifest.json``.
+
+    Shards split the date range (partition='date') or the hospital list
+    (partition='hospital'). Every shard draws from its own child of one
+    SeedSequence, so a given seed and shard count always produce the same
+    files, whatever the number of worker processes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names, bases = scaled_hospitals(hospitals, scale)
+    if partition == 'hospital':
+        spans = [(start_date, end_date, part) for part in _split(list(zip(names, bases)), shards)]
+    elif partition == 'date':
+        dates = pd.date_range(start_date, end_date, freq='D')
+        spans = [(part[0], part[-1], list(zip(names, bases))) for part in _split(list(dates), shards)]
+    else:
+        raise ValueError(f"Unknown partition '{partition}', expected 'date' or 'hospital'")
+
+    seed_sequence = np.random.SeedSequence(seed)
+    tasks = []
+    for shard, ((first, last, shard_hospitals), child) in enumerate(zip(spans, seed_sequence.spawn(len(spans)))):
+        tasks.append({
+            'shard': shard,
+            'path': os.path.join(output_dir, f"shard-{shard:05d}.{file_format}"),
+            'format': file_format,
+            'seed_sequence': child,
+            # Replicated hospitals were already expanded; keep their size class via the base name
+            'hospitals': [name for name, _ in shard_hospitals],
+            'base_names': [base for _, base in shard_hospitals],
+            'departments': list(departments),
+            'start_date': pd.Timestamp(first).strftime('%Y-%m-%d'),
+            'end_date': pd.Timestamp(last).strftime('%Y-%m-%d'),
+            'chunk_days': chunk_days,
+        })
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_generate_shard, tasks))
+
+    manifest = {
+        'format': file_format,
+        'columns': COLUMNS,
+        'seed': seed_sequence.entropy,
+        'partition': partition,
+        'total_rows': sum(task['rows'] for task in results),
+        'shards': [{
+            'path': os.path.basename(task['path']),
+            'rows': task['rows'],
+            'start_date': task['start_date'],
+            'end_date': task['end_date'],
+            'hospitals': task['hospitals'],
+        } for task in results],
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Generate the synthetic Wapi Daktari healthcare dataset.")
+    parser.add_argument('--hospitals', default=','.join(HOSPITALS), help="Comma-separated hospital names")
+    parser.add_argument('--departments', default=','.join(DEPARTMENTS), help="Comma-separated department names")
+    parser.add_argument('--start', default=START_DATE.strftime('%Y-%m-%d'), help="First date (YYYY-MM-DD)")
+    parser.add_argument('--end', default=END_DATE.strftime('%Y-%m-%d'), help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--scale', type=int, default=1, help="Copies of each hospital, for bigger load-test datasets")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible output")
+    parser.add_argument('--chunk-days', type=int, default=31, help="Dates generated and written per chunk")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="CSV file to write")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Output file format")
+    parser.add_argument('--shards', type=int, help="Generate this many shard files in parallel instead of one file")
+    parser.add_argument('--workers', type=int, help="Worker processes for sharded generation (default: CPU count)")
+    parser.add_argument('--partition', choices=['date', 'hospital'], default='date', help="How to split shards")
+    parser.add_argument('--output-dir', help="Directory for shard files and manifest.json")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    params = dict(
+        hospitals=args.hospitals.split(','),
+        departments=args.departments.split(','),
+        start_date=datetime.strptime(args.start, '%Y-%m-%d'),
+        end_date=datetime.strptime(args.end, '%Y-%m-%d'),
+        scale=args.scale,
+        seed=args.seed,
+        chunk_days=args.chunk_days,
+    )
+    if args.shards:
+        output_dir = args.output_dir or os.path.splitext(args.output)[0] + '_shards'
+        manifest = generate_sharded(output_dir, args.shards, workers=args.workers, partition=args.partition,
+                                    file_format=args.format, **params)
+        print(f"Wrote {manifest['total_rows']} rows in {len(manifest['shards'])} shards to {output_dir}")
+    else:
+        rows = generate(output=args.output, file_format=args.format, **params)
+        print(f"Wrote {rows} rows to {args.output}")
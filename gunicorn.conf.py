@@ -0,0 +1,23 @@
+# gunicorn.conf.py
+#
+# Preload-and-fork configuration: models are loaded once in the master by
+# src.api.wsgi:create_app() and shared copy-on-write with the workers.
+#
+#     gunicorn            (picks this file up from the working directory)
+
+import os
+
+wsgi_app = 'src.api.wsgi:create_app()'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# Load the app (and every model) in the master before forking the workers
+preload_app = True
+
+
+def post_worker_init(worker):
+    # Warm up (or catch up on a newer model bundle) before accepting requests,
+    # and reload the models in the background on SIGHUP
+    from src.api.wsgi import init_worker
+    init_worker()
@@ -1,22 +1,35 @@
-from flask import Flask, request, jsonify, render_template_string
-import joblib
-import numpy as np
+from flask import Flask, request, jsonify, g
 import os
+import time
 import logging
+# Models and preprocessor are loaded lazily, once per process, by the shared registry
+from src.api.model_registry import install_reload_signal, reload_status, resident_models
+from src.api import inference
+from src.api.cache import response_cache
+from src.api.docs import DOCS_HTML
+from src.api import metrics
 
-logging.basicConfig(level=logging.DEBUG)
+# INFO by default; LOG_LEVEL=DEBUG brings back the per-stage debug output
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 app = Flask(__name__)
 
-# Load the trained models and preprocessor
-base_path = os.path.dirname(os.path.abspath(__file__))
-rf_regressor = joblib.load(os.path.join(base_path, 'random_forest_regressor.pkl'))
-xgb_regressor = joblib.load(os.path.join(base_path, 'xgboost_regressor.pkl'))
-hybrid_regressor = joblib.load(os.path.join(base_path, 'hybrid_regressor.pkl'))
-rf_classifier = joblib.load(os.path.join(base_path, 'random_forest_classifier.pkl'))
-xgb_classifier = joblib.load(os.path.join(base_path, 'xgboost_classifier.pkl'))
-hybrid_classifier = joblib.load(os.path.join(base_path, 'hybrid_classifier.pkl'))
-preprocessor = joblib.load(os.path.join(base_path, 'preprocessor.pkl'))
-label_encoder = joblib.load(os.path.join(base_path, 'label_encoder.pkl'))
+def json_body():
+    # A malformed body is a JSON 400 like any other bad input, not Flask's HTML error page
+    data = request.get_json(force=True, silent=True)
+    if data is None:
+        raise inference.InvalidInput(inference.INVALID_JSON)
+    return data
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint)
+    metrics.REQUESTS.inc(endpoint, str(response.status_code))
+    return response
 
 @app.route('/')
 def home():
@@ -32,32 +45,67 @@ def predict_regression():
     if request.method == 'GET':
         return "This is the predict_regression endpoint. Use POST method with JSON data to make predictions."
     
-    data = request.get_json(force=True)
-    features = preprocessor.transform(np.array(data['features']).reshape(1, -1))
-    prediction_rf = rf_regressor.predict(features)
-    prediction_xgb = xgb_regressor.predict(features)
-    prediction_hybrid = hybrid_regressor.predict(features)
-    return jsonify({
-        'random_forest': prediction_rf.tolist(),
-        'xgboost': prediction_xgb.tolist(),
-        'hybrid': prediction_hybrid.tolist()
-    })
+    try:
+        data = json_body()
+        return jsonify(inference.predict_regression_single(data, request.args.get('models')))
+    except inference.InvalidInput as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/predict_classification', methods=['GET', 'POST'])
 def predict_classification():
     if request.method == 'GET':
         return "This is the predict_classification endpoint. Use POST method with JSON data to make predictions."
     
-    data = request.get_json(force=True)
-    features = preprocessor.transform(np.array(data['features']).reshape(1, -1))
-    prediction_rf = rf_classifier.predict(features)
-    prediction_xgb = xgb_classifier.predict(features)
-    prediction_hybrid = hybrid_classifier.predict(features)
-    return jsonify({
-        'random_forest': label_encoder.inverse_transform(prediction_rf).tolist(),
-        'xgboost': label_encoder.inverse_transform(prediction_xgb).tolist(),
-        'hybrid': label_encoder.inverse_transform(prediction_hybrid).tolist()
-    })
+    try:
+        data = json_body()
+        return jsonify(inference.predict_classification_single(data, request.args.get('models')))
+    except inference.InvalidInput as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/predict_regression/batch', methods=['POST'])
+def predict_regression_batch():
+    try:
+        return jsonify(inference.predict_regression_batch(json_body(), request.args.get('models')))
+    except inference.InvalidInput as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/predict_classification/batch', methods=['POST'])
+def predict_classification_batch():
+    try:
+        return jsonify(inference.predict_classification_batch(json_body(), request.args.get('models')))
+    except inference.InvalidInput as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/models')
+def models():
+    # Which artifacts this worker has loaded and roughly how much memory they hold
+    return jsonify(resident_models())
+
+@app.route('/batching')
+def batching():
+    # Micro-batch sizes and queueing delays per model, for tuning MICRO_BATCH_WAIT_MS
+    return jsonify(inference.batching_stats())
+
+@app.route('/cache')
+def cache():
+    return jsonify(response_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text format; each gunicorn worker reports its own process
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    # Swaps in a new model bundle for this process; with several gunicorn
+    # workers, signal them instead (see wsgi.py)
+    if not inference.admin_allowed(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    if request.method == 'GET':
+        return jsonify(reload_status())
+    if not inference.reload_models():
+        return jsonify({'error': 'A reload is already running', **reload_status()}), 409
+    return jsonify(reload_status()), 202
 
 @app.route('/ussd', methods=['GET', 'POST'])
 def ussd_callback():
@@ -66,71 +114,10 @@ def ussd_callback():
 
 @app.route('/docs')
 def docs():
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Wapi Daktari API Documentation</title>
-        <style>
-            body { font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; max-width: 800px; margin: 0 auto; }
-            h1 { color: #333; }
-            h2 { color: #666; }
-            pre { background-color: #f4f4f4; padding: 10px; border-radius: 5px; }
-            .endpoint { margin-bottom: 30px; }
-        </style>
-    </head>
-    <body>
-        <h1>Wapi Daktari API Documentation</h1>
-        
-        <div class="endpoint">
-            <h2>1. Predict Regression</h2>
-            <p><strong>Endpoint:</strong> /predict_regression</p>
-            <p><strong>Method:</strong> POST</p>
-            <p><strong>Description:</strong> Predicts waiting time using regression models.</p>
-            <p><strong>Example Request:</strong></p>
-            <pre>
-curl -X POST https://wapi-daktari.onrender.com/predict_regression \
--H "Content-Type: application/json" \
--d '{"features": [1, 2, 3, 4, 5]}'
-            </pre>
-        </div>
-
-        <div class="endpoint">
-            <h2>2. Predict Classification</h2>
-            <p><strong>Endpoint:</strong> /predict_classification</p>
-            <p><strong>Method:</strong> POST</p>
-            <p><strong>Description:</strong> Predicts congestion level using classification models.</p>
-            <p><strong>Example Request:</strong></p>
-            <pre>
-curl -X POST https://wapi-daktari.onrender.com/predict_classification \
--H "Content-Type: application/json" \
--d '{"features": [1, 2, 3, 4, 5]}'
-            </pre>
-        </div>
-
-        <div class="endpoint">
-            <h2>3. USSD Service</h2>
-            <p><strong>Endpoint:</strong> /ussd</p>
-            <p><strong>Method:</strong> POST</p>
-            <p><strong>Description:</strong> Handles USSD interactions for the service.</p>
-            <p><strong>Note:</strong> This endpoint is typically accessed through a USSD gateway and not directly by users.</p>
-        </div>
-        
-          <div class="endpoint">
-            <h2>4. Wapi Daktari Dashboard</h2>
-            <p><strong>URL:</strong> <a href="https://wapidaktari-lwhs69lmrfyyfd7cnqww9o.streamlit.app/" target="_blank">https://wapidaktari-lwhs69lmrfyyfd7cnqww9o.streamlit.app/</a></p>
-            <p><strong>Description:</strong> Interactive dashboard for visualizing Wapi Daktari data and predictions.</p>
-        </div>
-
-        <p>For more information or support, please contact gmail: joyywamaitha@gamil.com</p>
-    </body>
-    </html>
-    """
-    return render_template_string(html)
+    return DOCS_HTML
 
 if __name__ == '__main__':
+    install_reload_signal(inference.prepare_bundle)
     if os.environ.get('FLASK_ENV') == 'production':
         app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
     else:
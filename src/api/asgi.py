@@ -0,0 +1,182 @@
+# src/api/asgi.py
+#
+# Async serving mode. Exposes the same /predict_regression,
+# /predict_classification (plus /batch) and /ussd contracts as the Flask app,
+# but runs on an event loop:
+#
+#     uvicorn src.api.asgi:app --host 0.0.0.0 --port 8000
+#
+# Model inference is CPU-bound, so it is handed to a bounded thread pool
+# (INFERENCE_WORKERS threads) and the event loop stays free to accept gateway
+# callbacks during bursts. sklearn and xgboost release the GIL for most of
+# their predict work, so threads are enough here.
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+
+from src.api import inference, metrics
+from src.api.cache import response_cache
+from src.api.docs import DOCS_HTML
+from src.api.model_registry import install_reload_signal, reload_status, resident_models
+
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 4))
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    install_reload_signal(inference.prepare_bundle)
+    yield
+    executor.shutdown(wait=True)
+
+
+# /docs is the same hand-written page the Flask app serves, not FastAPI's generated one
+app = FastAPI(title="Wapi Daktari API", lifespan=lifespan, docs_url=None, redoc_url=None)
+
+
+@app.middleware('http')
+async def record_request(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get('route')
+    endpoint = route.path if route is not None else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+    metrics.REQUESTS.inc(endpoint, str(response.status_code))
+    return response
+
+
+async def run_inference(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn, *args)
+
+
+async def json_body(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        # json.JSONDecodeError, or a body that isn't UTF-8
+        data = None
+    if data is None:
+        raise inference.InvalidInput(inference.INVALID_JSON)
+    return data
+
+
+@app.get('/', response_class=PlainTextResponse)
+async def home():
+    return "Welcome to Wapi Daktari API. Visit /docs for API documentation."
+
+
+@app.get('/test', response_class=PlainTextResponse)
+async def test():
+    return "Test endpoint working"
+
+
+@app.get('/predict_regression', response_class=PlainTextResponse)
+async def predict_regression_info():
+    return "This is the predict_regression endpoint. Use POST method with JSON data to make predictions."
+
+
+@app.post('/predict_regression')
+async def predict_regression(request: Request):
+    try:
+        data = await json_body(request)
+        return await run_inference(inference.predict_regression_single, data, request.query_params.get('models'))
+    except inference.InvalidInput as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+@app.get('/predict_classification', response_class=PlainTextResponse)
+async def predict_classification_info():
+    return "This is the predict_classification endpoint. Use POST method with JSON data to make predictions."
+
+
+@app.post('/predict_classification')
+async def predict_classification(request: Request):
+    try:
+        data = await json_body(request)
+        return await run_inference(inference.predict_classification_single, data, request.query_params.get('models'))
+    except inference.InvalidInput as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+@app.post('/predict_regression/batch')
+async def predict_regression_batch(request: Request):
+    try:
+        data = await json_body(request)
+        return await run_inference(inference.predict_regression_batch, data, request.query_params.get('models'))
+    except inference.InvalidInput as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+@app.post('/predict_classification/batch')
+async def predict_classification_batch(request: Request):
+    try:
+        data = await json_body(request)
+        return await run_inference(inference.predict_classification_batch, data, request.query_params.get('models'))
+    except inference.InvalidInput as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+@app.get('/models')
+async def models():
+    return resident_models()
+
+
+@app.get('/batching')
+async def batching():
+    return inference.batching_stats()
+
+
+@app.get('/cache')
+async def cache():
+    return response_cache.stats()
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@app.get('/admin/reload')
+async def admin_reload_status(request: Request):
+    if not inference.admin_allowed(request.headers.get('X-Admin-Token')):
+        return JSONResponse({'error': 'Forbidden'}, status_code=403)
+    return reload_status()
+
+
+@app.post('/admin/reload')
+async def admin_reload(request: Request):
+    # Swaps in a new model bundle for this process only
+    if not inference.admin_allowed(request.headers.get('X-Admin-Token')):
+        return JSONResponse({'error': 'Forbidden'}, status_code=403)
+    if not inference.reload_models():
+        return JSONResponse({'error': 'A reload is already running', **reload_status()}, status_code=409)
+    return JSONResponse(reload_status(), status_code=202)
+
+
+@app.get('/docs', response_class=HTMLResponse)
+async def docs():
+    return DOCS_HTML
+
+
+@app.api_route('/ussd', methods=['GET', 'POST'], response_class=PlainTextResponse)
+async def ussd(request: Request):
+    from src.ussd.ussd_app import handle_ussd
+
+    # Gateways post application/x-www-form-urlencoded; parse it directly rather
+    # than pulling in python-multipart for request.form()
+    form = parse_qs((await request.body()).decode(), keep_blank_values=True)
+
+    def field(name):
+        values = form.get(name)
+        return values[0] if values else None
+
+    return await run_inference(handle_ussd, field('sessionId'), field('phoneNumber'), field('text'))
@@ -0,0 +1,143 @@
+# src/api/batching.py
+#
+# Dynamic micro-batching for model inference.
+#
+# Random forest and XGBoost predict calls carry a fixed per-call overhead
+# (input validation, per-estimator dispatch, thread start-up) that dwarfs the
+# cost of scoring one row. A MicroBatcher queues the rows submitted by
+# concurrent requests for up to max_wait_ms (or until max_batch_size rows are
+# waiting), runs a single predict over all of them and hands each caller its
+# own slice of the result. When that predict raises, each request's rows are
+# predicted again on their own, so one bad request fails alone instead of
+# taking every request in its batch down with it.
+
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=3.0, name='batcher'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._batch_sizes = {}
+        self._total_delay = 0.0
+        self._max_delay = 0.0
+        self._failed_batches = 0
+
+    def submit(self, rows):
+        """Queue a 2D block of rows for prediction; returns a Future of their predictions."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((np.asarray(rows), future, time.perf_counter()))
+        return future
+
+    def predict(self, rows):
+        return self.submit(rows).result()
+
+    def close(self):
+        """Stop the worker thread once the rows already queued have been predicted."""
+        self._queue.put(None)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'batches': self._batches,
+                'rows': self._rows,
+                'mean_batch_size': self._rows / self._batches if self._batches else 0.0,
+                'largest_batch': self._largest_batch,
+                'batch_size_counts': dict(sorted(self._batch_sizes.items())),
+                'mean_queue_delay_ms': 1000 * self._total_delay / self._rows if self._rows else 0.0,
+                'max_queue_delay_ms': 1000 * self._max_delay,
+                'failed_batches': self._failed_batches,
+            }
+
+    def _ensure_started(self):
+        # Started on first use rather than in __init__ so that a batcher created
+        # before gunicorn forks still gets a live thread in each worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first[0])
+            deadline = first[2] + self.max_wait
+            closing = False
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    # Past the deadline, still take whatever is already waiting
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._process(batch, size)
+            if closing:
+                return
+
+    def _process(self, batch, size):
+        started = time.perf_counter()
+        try:
+            predictions = self.predict_fn(np.concatenate([rows for rows, _, _ in batch]))
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+            else:
+                # Retry each request alone so only the one that raises fails
+                for rows, future, _ in batch:
+                    self._predict_alone(rows, future)
+            with self._stats_lock:
+                self._failed_batches += 1
+            return
+
+        offset = 0
+        for rows, future, _ in batch:
+            future.set_result(predictions[offset:offset + len(rows)])
+            offset += len(rows)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._rows += size
+            self._largest_batch = max(self._largest_batch, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            for rows, _, enqueued in batch:
+                delay = started - enqueued
+                self._total_delay += delay * len(rows)
+                self._max_delay = max(self._max_delay, delay)
+
+    def _predict_alone(self, rows, future):
+        try:
+            future.set_result(self.predict_fn(rows))
+        except Exception as e:
+            future.set_exception(e)
@@ -0,0 +1,165 @@
+# src/api/cache.py
+#
+# LRU + TTL cache for prediction responses.
+#
+# USSD users overwhelmingly ask the same few questions, and partner
+# integrations re-send identical feature vectors, so identical inputs are
+# answered from memory. Keys are a canonical hash of the request inputs; the
+# storage backend is pluggable so several workers can share one cache.
+#
+# Keys include the model bundle's version, so a request still running on the
+# previous bundle during a hot reload can't store its answer for the new one,
+# and the cache is cleared whenever a new bundle is swapped in.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from src.api import metrics, model_registry
+
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+
+
+class CacheBackend(ABC):
+    """Storage interface for ResponseCache.
+
+    Keys are strings and values are picklable, so a backend can live outside
+    the process (e.g. a local Redis). ``get`` returns None on a miss.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """The value stored under ``key``, or None if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting as the backend sees fit."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove ``key`` if present."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove every entry."""
+
+    @abstractmethod
+    def __len__(self):
+        """Number of live entries."""
+
+
+class InProcessBackend(CacheBackend):
+    """Thread-safe LRU dict whose entries expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        # Expired entries are only dropped when looked up; purge them so the count is of live ones
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, (_, expires_at) in self._data.items() if expires_at < now]:
+                del self._data[key]
+            return len(self._data)
+
+
+def make_key(parts):
+    """Canonical hash of JSON-like request inputs (dict key order does not matter)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get_or_compute(self, parts, compute):
+        key = make_key([model_registry.current().version, *parts])
+        value = self.backend.get(key)
+        if value is not None:
+            with self._counter_lock:
+                self.hits += 1
+            return value
+
+        with self._counter_lock:
+            self.misses += 1
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'entries': len(self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache(InProcessBackend())
+
+
+def set_backend(backend):
+    """Swap the storage backend, e.g. for one shared between workers."""
+    response_cache.backend = backend
+
+
+# Cached answers are only valid for the models that produced them
+model_registry.on_reload(response_cache.clear)
+
+
+def _collect():
+    stats = response_cache.stats()
+    return [
+        ('wapi_response_cache_hits_total', 'counter', "Response cache hits", {(): stats['hits']}, ()),
+        ('wapi_response_cache_misses_total', 'counter', "Response cache misses", {(): stats['misses']}, ()),
+        ('wapi_response_cache_entries', 'gauge', "Entries in the response cache", {(): stats['entries']}, ()),
+    ]
+
+
+metrics.register_collector(_collect)
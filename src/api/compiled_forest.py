@@ -0,0 +1,125 @@
+# src/api/compiled_forest.py
+#
+# Compiled inference for the random forest models.
+#
+# scikit-learn's generic predict spends most of a single-row call on input
+# validation and dispatching to each estimator in turn. A CompiledForest
+# flattens every fitted tree into shared NumPy node tables (feature,
+# threshold, left/right child, leaf value) and walks all trees for all rows
+# at once, one vectorized step per tree level.
+#
+# Which models use it is configured per model with COMPILED_MODELS, e.g.
+#
+#     COMPILED_MODELS=rf_regressor,rf_classifier
+
+import os
+
+import numpy as np
+
+from src.api import model_registry
+
+COMPILED_MODELS = {name.strip() for name in os.environ.get('COMPILED_MODELS', '').split(',') if name.strip()}
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, value, roots, depth, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.classes_ = classes
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestRegressor/RandomForestClassifier."""
+        is_classifier = hasattr(model, 'classes_')
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output forests can be compiled")
+
+            n_nodes = tree.node_count
+            nodes = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves, so every row can take the same number
+            # of steps no matter how deep its leaf is
+            left = np.where(is_leaf, nodes, tree.children_left) + offset
+            right = np.where(is_leaf, nodes, tree.children_right) + offset
+            feature = np.where(is_leaf, 0, tree.feature)
+
+            value = tree.value[:, 0, :]
+            if is_classifier:
+                # Per-tree class probabilities, as in DecisionTreeClassifier.predict_proba
+                totals = value.sum(axis=1, keepdims=True)
+                value = value / np.where(totals == 0, 1, totals)
+            else:
+                value = value[:, 0]
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            depth = max(depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            depth=depth,
+            classes=model.classes_ if is_classifier else None,
+        )
+
+    def _leaf_values(self, X):
+        # sklearn compares float32 feature values against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        # sklearn rejects infinity and routes NaN by its missing-value rules;
+        # the node tables have no such rules, so refuse both
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        # (n_rows, n_trees[, n_classes]) -> average over trees
+        return self.value[node].mean(axis=1)
+
+    def predict_proba(self, X):
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._leaf_values(X)
+
+    def predict(self, X):
+        averaged = self._leaf_values(X)
+        if self.classes_ is None:
+            return averaged
+        return self.classes_[np.argmax(averaged, axis=1)]
+
+
+def compiled_model(name):
+    """Return the CompiledForest for model ``name`` in the current bundle, compiling it on first use."""
+    bundle = model_registry.current()
+    return bundle.derived(('compiled', name), lambda: CompiledForest.from_sklearn(bundle.get(name)))
+
+
+def predictor(name):
+    """The object to call predict on for ``name``: compiled when configured, else the registry model."""
+    if name in COMPILED_MODELS:
+        return compiled_model(name)
+    return model_registry.get_model(name)
@@ -0,0 +1,88 @@
+# src/api/docs.py
+#
+# The HTML documentation page, served at /docs by both the Flask app and the
+# ASGI app.
+
+DOCS_HTML = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Wapi Daktari API Documentation</title>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; max-width: 800px; margin: 0 auto; }
+            h1 { color: #333; }
+            h2 { color: #666; }
+            pre { background-color: #f4f4f4; padding: 10px; border-radius: 5px; }
+            .endpoint { margin-bottom: 30px; }
+        </style>
+    </head>
+    <body>
+        <h1>Wapi Daktari API Documentation</h1>
+        
+        <div class="endpoint">
+            <h2>1. Predict Regression</h2>
+            <p><strong>Endpoint:</strong> /predict_regression</p>
+            <p><strong>Method:</strong> POST</p>
+            <p><strong>Description:</strong> Predicts waiting time using regression models.</p>
+            <p><strong>Example Request:</strong></p>
+            <pre>
+curl -X POST https://wapi-daktari.onrender.com/predict_regression \
+-H "Content-Type: application/json" \
+-d '{"features": [1, 2, 3, 4, 5]}'
+            </pre>
+        </div>
+
+        <div class="endpoint">
+            <h2>2. Predict Classification</h2>
+            <p><strong>Endpoint:</strong> /predict_classification</p>
+            <p><strong>Method:</strong> POST</p>
+            <p><strong>Description:</strong> Predicts congestion level using classification models.</p>
+            <p><strong>Example Request:</strong></p>
+            <pre>
+curl -X POST https://wapi-daktari.onrender.com/predict_classification \
+-H "Content-Type: application/json" \
+-d '{"features": [1, 2, 3, 4, 5]}'
+            </pre>
+            <p><strong>Selecting models:</strong> All prediction endpoints return random_forest, xgboost and hybrid by default. Pass <code>"models": ["hybrid"]</code> in the body, or <code>?models=random_forest,xgboost</code>, to run and return only those.</p>
+        </div>
+
+        <div class="endpoint">
+            <h2>3. Batch Predictions</h2>
+            <p><strong>Endpoints:</strong> /predict_regression/batch, /predict_classification/batch</p>
+            <p><strong>Method:</strong> POST</p>
+            <p><strong>Description:</strong> Runs the models once over many rows. Send either a list of feature rows or a list of records keyed by column name. Results are returned in the same order as the input rows. At most MAX_BATCH_SIZE rows (default 1000) are accepted per request.</p>
+            <p><strong>Example Request:</strong></p>
+            <pre>
+curl -X POST https://wapi-daktari.onrender.com/predict_regression/batch \
+-H "Content-Type: application/json" \
+-d '{"records": [{"hospital_name": "KNH", "department": "Emergency", ...}, ...]}'
+            </pre>
+        </div>
+
+        <div class="endpoint">
+            <h2>4. Model Versions</h2>
+            <p><strong>Endpoint:</strong> /admin/reload</p>
+            <p><strong>Method:</strong> GET (status), POST (reload)</p>
+            <p><strong>Description:</strong> Every prediction response includes <code>model_version</code>. POST loads the model bundle in MODEL_DIR in the background and swaps it in once it is ready; requests already running finish on the previous version. Requires the <code>X-Admin-Token</code> header to match ADMIN_TOKEN.</p>
+        </div>
+
+        <div class="endpoint">
+            <h2>5. USSD Service</h2>
+            <p><strong>Endpoint:</strong> /ussd</p>
+            <p><strong>Method:</strong> POST</p>
+            <p><strong>Description:</strong> Handles USSD interactions for the service.</p>
+            <p><strong>Note:</strong> This endpoint is typically accessed through a USSD gateway and not directly by users.</p>
+        </div>
+        
+          <div class="endpoint">
+            <h2>6. Wapi Daktari Dashboard</h2>
+            <p><strong>URL:</strong> <a href="https://wapidaktari-lwhs69lmrfyyfd7cnqww9o.streamlit.app/" target="_blank">https://wapidaktari-lwhs69lmrfyyfd7cnqww9o.streamlit.app/</a></p>
+            <p><strong>Description:</strong> Interactive dashboard for visualizing Wapi Daktari data and predictions.</p>
+        </div>
+
+        <p>For more information or support, please contact gmail: joyywamaitha@gamil.com</p>
+    </body>
+    </html>
+    """
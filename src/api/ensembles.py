@@ -0,0 +1,124 @@
+# src/api/ensembles.py
+#
+# Shared computation for the hybrid models.
+#
+# hybrid_regressor and hybrid_classifier are a VotingRegressor and a
+# hard-voting VotingClassifier over a random forest and an XGBoost model.
+# Their predict evaluates both members again, so a request that also returns
+# the standalone models' outputs walks every tree twice.
+#
+# The training notebook fits clones of the standalone models inside each
+# hybrid, so a member is often - but not always - identical to the
+# standalone artifact. Every member is fingerprinted - a digest of what its
+# predict depends on: tree node arrays and classes for a forest, the booster
+# for XGBoost - against the standalone models of the same task. A member
+# that matches reuses that model's output; one that doesn't is evaluated on
+# its own. The votes are then combined the way sklearn combines them. Any
+# other kind of hybrid, or one that shares nothing, is predicted as a whole.
+
+import hashlib
+import logging
+
+import numpy as np
+from sklearn.ensemble import VotingClassifier, VotingRegressor
+
+from src.api import model_registry
+from src.api.metrics import MODEL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Hybrid -> standalone models its members may be shared with
+CANDIDATES = {
+    'hybrid_regressor': ('rf_regressor', 'xgb_regressor'),
+    'hybrid_classifier': ('rf_classifier', 'xgb_classifier'),
+}
+
+class Plan:
+    """How to predict a hybrid from the outputs of the standalone models it shares members with."""
+
+    def __init__(self, name, hybrid, sources):
+        self.name = name
+        self.hybrid = hybrid
+        # Per fitted member: the registry model whose output it reuses, or None
+        self.sources = sources
+
+    @property
+    def shared(self):
+        return [source for source in self.sources if source is not None]
+
+    def _weights(self):
+        if self.hybrid.weights is None:
+            return None
+        # estimators_ leaves out members set to 'drop', and so must the weights
+        return [weight for (_, estimator), weight in zip(self.hybrid.estimators, self.hybrid.weights)
+                if estimator != 'drop']
+
+    def combine(self, outputs, features):
+        """The hybrid's prediction, given ``outputs`` (registry name -> prediction) for the shared members."""
+        columns = []
+        for (member, estimator), source in zip(self.hybrid.named_estimators_.items(), self.sources):
+            if source is not None:
+                columns.append(outputs[source])
+            else:
+                with MODEL_SECONDS.time(f'{self.name}.{member}'):
+                    columns.append(estimator.predict(features))
+        predictions = np.column_stack(columns)
+        weights = self._weights()
+
+        if isinstance(self.hybrid, VotingRegressor):
+            return np.average(predictions, axis=1, weights=weights)
+
+        # Hard voting: members predict encoded labels; the first class wins a tie, as with np.bincount
+        codes = predictions.astype(np.intp)
+        votes = np.zeros((len(codes), len(self.hybrid.le_.classes_)))
+        rows = np.arange(len(codes))
+        for column, weight in zip(codes.T, weights or [1.0] * codes.shape[1]):
+            votes[rows, column] += weight
+        return self.hybrid.le_.inverse_transform(votes.argmax(axis=1))
+
+
+def fingerprint(model):
+    """Digest of the fitted state ``model.predict`` depends on, or None for a model type it can't vouch for."""
+    digest = hashlib.sha256(type(model).__name__.encode())
+    classes = getattr(model, 'classes_', None)
+    if classes is not None:
+        digest.update(repr(np.asarray(classes).tolist()).encode())
+
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None and all(hasattr(estimator, 'tree_') for estimator in estimators):
+        for estimator in estimators:
+            tree = estimator.tree_
+            for array in (tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value):
+                digest.update(np.ascontiguousarray(array).tobytes())
+    elif hasattr(model, 'get_booster'):
+        digest.update(bytes(model.get_booster().save_raw('ubj')))
+    else:
+        return None
+    return digest.hexdigest()
+
+
+def _build(bundle, name):
+    hybrid = bundle.get(name)
+    supported = isinstance(hybrid, VotingRegressor) or (
+        isinstance(hybrid, VotingClassifier) and hybrid.voting == 'hard')
+    if not supported:
+        logger.info(f"{name} is a {type(hybrid).__name__}; predicting it as a whole")
+        return None
+
+    fingerprints = {fingerprint(bundle.get(candidate)): candidate for candidate in CANDIDATES[name]}
+    fingerprints.pop(None, None)
+    sources = [fingerprints.get(fingerprint(estimator)) for estimator in hybrid.estimators_]
+    logger.info(f"{name}: " + ', '.join(
+        f"{member} {'shared with ' + source if source else 'evaluated separately'}"
+        for member, source in zip(hybrid.named_estimators_, sources)))
+    if not any(sources):
+        return None
+    return Plan(name, hybrid, sources)
+
+
+def plan(name):
+    """The Plan for hybrid ``name`` in the current bundle, or None when it should be predicted directly."""
+    if name not in CANDIDATES:
+        return None
+    bundle = model_registry.current()
+    return bundle.derived(('plan', name), lambda: _build(bundle, name))
@@ -0,0 +1,104 @@
+# src/api/frozen_preprocessor.py
+#
+# A "frozen" copy of the fitted preprocessor for single-row requests.
+#
+# preprocessor.pkl is a ColumnTransformer (StandardScaler on the numeric
+# columns, OneHotEncoder on the categorical ones). For one row, building a
+# DataFrame and going through the ColumnTransformer machinery costs far more
+# than the arithmetic itself. FrozenPreprocessor keeps only the fitted
+# numbers - scaler means/scales and one-hot category positions - and turns a
+# plain tuple, list or dict into the model input vector directly.
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.api import model_registry
+
+
+class FrozenPreprocessor:
+    def __init__(self, columns, width, numeric_positions, numeric_outputs, mean, scale, categorical):
+        self.columns = columns
+        self.width = width
+        self.numeric_positions = numeric_positions
+        self.numeric_outputs = numeric_outputs
+        self.mean = mean
+        self.scale = scale
+        # [(input position, {category: output index})]
+        self.categorical = categorical
+        self._column_index = {column: i for i, column in enumerate(columns)}
+
+    @classmethod
+    def from_column_transformer(cls, transformer):
+        """Freeze a fitted ColumnTransformer built from StandardScaler/OneHotEncoder/passthrough steps."""
+        columns = list(transformer.feature_names_in_)
+        position = {column: i for i, column in enumerate(columns)}
+        numeric_positions, numeric_outputs, means, scales = [], [], [], []
+        categorical = []
+        width = 0
+
+        for name, step, step_columns in transformer.transformers_:
+            if step == 'drop' or len(step_columns) == 0:
+                continue
+            step_columns = [columns[c] if isinstance(c, (int, np.integer)) else c for c in step_columns]
+
+            if step == 'passthrough' or isinstance(step, StandardScaler):
+                n = len(step_columns)
+                mean = getattr(step, 'mean_', None)
+                scale = getattr(step, 'scale_', None)
+                numeric_positions.extend(position[c] for c in step_columns)
+                numeric_outputs.extend(range(width, width + n))
+                means.extend(mean if mean is not None else np.zeros(n))
+                scales.extend(scale if scale is not None else np.ones(n))
+                width += n
+            elif isinstance(step, OneHotEncoder):
+                if step.drop is not None or step.handle_unknown != 'ignore':
+                    raise ValueError(f"Cannot freeze '{name}': only OneHotEncoder(drop=None, handle_unknown='ignore') is supported")
+                for column, categories in zip(step_columns, step.categories_):
+                    mapping = {category: width + j for j, category in enumerate(categories.tolist())}
+                    categorical.append((position[column], mapping))
+                    width += len(categories)
+            else:
+                raise ValueError(f"Cannot freeze '{name}': unsupported transformer {type(step).__name__}")
+
+        return cls(
+            columns=columns,
+            width=width,
+            numeric_positions=np.array(numeric_positions, dtype=np.intp),
+            numeric_outputs=np.array(numeric_outputs, dtype=np.intp),
+            mean=np.array(means, dtype=np.float64),
+            scale=np.array(scales, dtype=np.float64),
+            categorical=categorical,
+        )
+
+    def transform_row(self, row):
+        """Transform one row (sequence in ``columns`` order, or a mapping) into a 1 x width matrix."""
+        if isinstance(row, Mapping):
+            row = [row[column] for column in self.columns]
+        if len(row) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} features, got {len(row)}")
+
+        out = np.zeros((1, self.width))
+        numeric = np.array([row[i] for i in self.numeric_positions], dtype=np.float64)
+        out[0, self.numeric_outputs] = (numeric - self.mean) / self.scale
+        for i, mapping in self.categorical:
+            j = mapping.get(row[i])
+            # Unknown categories encode as all zeros, like handle_unknown='ignore'
+            if j is not None:
+                out[0, j] = 1.0
+        return out
+
+    def transform(self, rows):
+        """Transform a DataFrame or a sequence of rows into an N x width matrix."""
+        if isinstance(rows, pd.DataFrame):
+            rows = list(rows[self.columns].itertuples(index=False, name=None))
+        return np.vstack([self.transform_row(row) for row in rows]) if len(rows) else np.zeros((0, self.width))
+
+
+def frozen_preprocessor():
+    """The frozen form of the current bundle's preprocessor, built on first use."""
+    bundle = model_registry.current()
+    return bundle.derived('frozen_preprocessor',
+                          lambda: FrozenPreprocessor.from_column_transformer(bundle.get('preprocessor')))
@@ -0,0 +1,313 @@
+# src/api/inference.py
+#
+# Framework-independent prediction logic shared by the Flask app (app.py) and
+# the ASGI app (asgi.py), so both serve identical responses.
+#
+# Each prediction request runs pinned to one model bundle (see
+# model_registry.py) and its response carries that bundle's version as
+# "model_version".
+
+import hmac
+import os
+import weakref
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from src.api import ensembles, model_registry
+from src.api.batching import MicroBatcher
+from src.api.cache import response_cache
+from src.api.compiled_forest import predictor
+from src.api.frozen_preprocessor import frozen_preprocessor
+from src.api.metrics import MODEL_SECONDS, span
+from src.api.model_registry import get_model
+
+# Upper bound on rows accepted by the batch endpoints
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# Error for a request body that isn't JSON, the same from both apps
+INVALID_JSON = "Request body must be valid JSON"
+
+# Micro-batching of concurrent small requests; a window of 0 ms turns it off
+MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', 0))
+MICRO_BATCH_MAX_ROWS = int(os.environ.get('MICRO_BATCH_MAX_ROWS', 64))
+
+# Shared secret for the admin endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Response key -> registry model, in response order
+REGRESSORS = {'random_forest': 'rf_regressor', 'xgboost': 'xgb_regressor', 'hybrid': 'hybrid_regressor'}
+CLASSIFIERS = {'random_forest': 'rf_classifier', 'xgboost': 'xgb_classifier', 'hybrid': 'hybrid_classifier'}
+MODEL_KEYS = tuple(REGRESSORS)
+
+
+class InvalidInput(ValueError):
+    """The request itself is wrong; both apps answer it with a 400 and the message.
+
+    Anything else raised while serving - a model or bundle failing, an
+    artifact rejecting its own output - is a server fault and stays a 500.
+    """
+
+
+def request_object(data):
+    """``data`` if it is a JSON object; the prediction endpoints take nothing else."""
+    if not isinstance(data, dict):
+        raise InvalidInput("Request body must be a JSON object")
+    return data
+
+
+def _batcher(name):
+    bundle = model_registry.current()
+    return bundle.derived(('batcher', name), lambda: _start_batcher(bundle, name))
+
+
+def _start_batcher(bundle, name):
+    # Each bundle has its own batchers, so a batch never mixes model versions.
+    # The batcher thread only holds a weak reference and stops once the bundle
+    # has been swapped out and its last pinned request is done.
+    ref = weakref.ref(bundle)
+
+    def predict(features):
+        with model_registry.pinned(ref()):
+            return _predict(name, features)
+
+    batcher = MicroBatcher(predict, max_batch_size=MICRO_BATCH_MAX_ROWS,
+                           max_wait_ms=MICRO_BATCH_WAIT_MS, name=name)
+    weakref.finalize(bundle, batcher.close)
+    return batcher
+
+
+def _predict(name, features):
+    with MODEL_SECONDS.time(name):
+        return predictor(name).predict(features)
+
+
+def predict_async(name, features):
+    """Start ``predict(features)`` on model ``name``, micro-batched with other requests when enabled."""
+    if MICRO_BATCH_WAIT_MS > 0 and len(features) < MICRO_BATCH_MAX_ROWS:
+        return _batcher(name).submit(features)
+
+    future = Future()
+    future.set_result(_predict(name, features))
+    return future
+
+
+def predict_models(names, features):
+    """Run several models over the same features; their batches are in flight concurrently.
+
+    A hybrid whose members match standalone models is assembled from those
+    models' outputs (see ensembles.py) instead of evaluating them again.
+    """
+    plans = {name: ensembles.plan(name) for name in names}
+    direct = [name for name in names if plans[name] is None]
+    shared = [source for plan in plans.values() if plan is not None for source in plan.shared]
+    run = list(dict.fromkeys(direct + shared))
+
+    pending = [predict_async(name, features) for name in run]
+    outputs = {name: future.result() for name, future in zip(run, pending)}
+    for name, plan in plans.items():
+        if plan is not None:
+            outputs[name] = plan.combine(outputs, features)
+    return [outputs[name] for name in names]
+
+
+def selected_models(data, query=None):
+    """Response keys chosen with ``"models"`` in the body or ``?models=`` (all of them by default).
+
+    Accepts a list or a comma-separated string of random_forest, xgboost, hybrid.
+    """
+    value = data.get('models', query) if isinstance(data, dict) else query
+    if value is None:
+        return MODEL_KEYS
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not all(isinstance(key, str) for key in value):
+        raise InvalidInput("'models' must be a list or comma-separated string of model names")
+
+    selected = {key.strip() for key in value if key.strip()}
+    unknown = selected - set(MODEL_KEYS)
+    if unknown:
+        raise InvalidInput(f"Unknown models: {', '.join(sorted(unknown))}. Choose from {', '.join(MODEL_KEYS)}")
+    if not selected:
+        raise InvalidInput("'models' is empty")
+    return tuple(key for key in MODEL_KEYS if key in selected)
+
+
+def batching_stats():
+    bundle = model_registry.current()
+    stats = {}
+    for name in bundle.files():
+        batcher = bundle.peek(('batcher', name))
+        if batcher is not None:
+            stats[name] = batcher.stats()
+    return stats
+
+
+def single_row(data):
+    """The row sent as ``{"features": [...]}`` (or a dict keyed by column), checked against the preprocessor's columns."""
+    if 'features' not in request_object(data):
+        raise InvalidInput("Request body must contain 'features'")
+    row = data['features']
+    columns = frozen_preprocessor().columns
+    if isinstance(row, dict):
+        missing = [column for column in columns if column not in row]
+        if missing:
+            raise InvalidInput(f"'features' is missing {', '.join(missing)}")
+    elif isinstance(row, list):
+        if len(row) != len(columns):
+            raise InvalidInput(f"Expected {len(columns)} features, got {len(row)}")
+    else:
+        raise InvalidInput("'features' must be a list or an object keyed by column")
+    return row
+
+
+def _checked(features):
+    # Missing or infinite numbers would otherwise reach the models as NaN/inf
+    if not np.isfinite(features).all():
+        raise InvalidInput("Numeric features must be finite numbers")
+    return features
+
+
+def single_features(row):
+    """Preprocess one row returned by single_row()."""
+    preprocessor = frozen_preprocessor()
+    with span('preprocess'):
+        try:
+            features = preprocessor.transform_row(row)
+        except (ValueError, TypeError) as e:
+            raise InvalidInput(f"Invalid features: {e}") from e
+    return _checked(features)
+
+
+def batch_features(data):
+    """Build one preprocessed matrix from a batch request body.
+
+    Accepts either ``{"features": [[...], ...]}`` (an N x F matrix in the
+    preprocessor's column order) or ``{"records": [{...}, ...]}``.
+    """
+    if 'records' in request_object(data):
+        records = data['records']
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise InvalidInput("'records' must be a list of objects")
+        rows = pd.DataFrame(records)
+    elif 'features' in data:
+        matrix = np.array(data['features'], dtype=object)
+        if matrix.ndim != 2:
+            raise InvalidInput("'features' must be a list of rows")
+        columns = getattr(get_model('preprocessor'), 'feature_names_in_', None)
+        if columns is not None and matrix.shape[1] == len(columns):
+            rows = pd.DataFrame(matrix, columns=columns)
+        else:
+            rows = matrix
+    else:
+        raise InvalidInput("Request body must contain 'features' or 'records'")
+
+    if len(rows) == 0:
+        raise InvalidInput("Batch is empty")
+    if len(rows) > MAX_BATCH_SIZE:
+        raise InvalidInput(f"Batch of {len(rows)} rows exceeds the maximum of {MAX_BATCH_SIZE}")
+
+    preprocessor = get_model('preprocessor')
+    with span('preprocess'):
+        try:
+            features = preprocessor.transform(rows)
+        except (ValueError, TypeError) as e:
+            raise InvalidInput(f"Invalid features: {e}") from e
+    return _checked(features)
+
+
+def predict_regression(features, models=MODEL_KEYS):
+    predictions = predict_models([REGRESSORS[key] for key in models], features)
+    return {key: prediction.tolist() for key, prediction in zip(models, predictions)}
+
+
+def predict_classification(features, models=MODEL_KEYS):
+    predictions = predict_models([CLASSIFIERS[key] for key in models], features)
+    label_encoder = get_model('label_encoder')
+    return {key: label_encoder.inverse_transform(prediction).tolist() for key, prediction in zip(models, predictions)}
+
+
+def predict_regression_single(data, query=None):
+    models = selected_models(request_object(data), query)
+    with model_registry.pinned() as bundle:
+        row = single_row(data)
+        # Identical feature vectors are answered from the response cache
+        response = response_cache.get_or_compute(
+            ['regression', models, row], lambda: predict_regression(single_features(row), models))
+    return {**response, 'model_version': bundle.version}
+
+
+def predict_classification_single(data, query=None):
+    models = selected_models(request_object(data), query)
+    with model_registry.pinned() as bundle:
+        row = single_row(data)
+        response = response_cache.get_or_compute(
+            ['classification', models, row], lambda: predict_classification(single_features(row), models))
+    return {**response, 'model_version': bundle.version}
+
+
+def predict_regression_batch(data, query=None):
+    models = selected_models(request_object(data), query)
+    with model_registry.pinned() as bundle:
+        features = batch_features(data)
+        return {'count': len(features), **predict_regression(features, models), 'model_version': bundle.version}
+
+
+def predict_classification_batch(data, query=None):
+    models = selected_models(request_object(data), query)
+    with model_registry.pinned() as bundle:
+        features = batch_features(data)
+        return {'count': len(features), **predict_classification(features, models), 'model_version': bundle.version}
+
+
+def predictors():
+    """Every artifact in the current bundle that has a predict method."""
+    return [name for name in model_registry.current().files() if name not in ('preprocessor', 'label_encoder')]
+
+
+def dummy_features():
+    """One synthetic input row the preprocessor accepts: zeros and the first known category."""
+    preprocessor = get_model('preprocessor')
+    row = {column: 0 for column in preprocessor.feature_names_in_}
+    for _, transformer, columns in preprocessor.transformers_:
+        for column, categories in zip(columns, getattr(transformer, 'categories_', [])):
+            row[column] = categories[0]
+    return pd.DataFrame([row])
+
+
+def warm_up():
+    """Run one transform and one predict per model, through the same predictors requests use."""
+    features = dummy_features()
+    X = get_model('preprocessor').transform(features)
+    frozen_preprocessor().transform_row(features.iloc[0].to_dict())
+    names = predictors()
+    for name in names:
+        _predict(name, X)
+    for name in ensembles.CANDIDATES:
+        ensembles.plan(name)
+    return names
+
+
+def prepare_bundle():
+    """Warm up the pinned, incoming bundle before it is swapped in.
+
+    The USSD feature table is laid out for the serving preprocessor's input
+    columns, so a bundle whose preprocessor reads different ones is refused.
+    """
+    warm_up()
+    incoming = frozen_preprocessor().columns
+    with model_registry.pinned(model_registry.active()):
+        serving = frozen_preprocessor().columns
+    if incoming != serving:
+        raise model_registry.BundleError("The new preprocessor reads different input columns; restart to deploy it")
+
+
+def reload_models():
+    """Load MODEL_DIR's bundle in the background and swap it in; False if a reload is already running."""
+    return model_registry.reload_in_background(prepare=prepare_bundle)
+
+
+def admin_allowed(token):
+    """Whether ``token`` (the X-Admin-Token header) grants access to the admin endpoints."""
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
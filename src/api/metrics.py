@@ -0,0 +1,161 @@
+# src/api/metrics.py
+#
+# Low-overhead latency instrumentation and a Prometheus text exposition.
+#
+# Each serving stage - feature lookup, preprocessing, every model's predict
+# call, the USSD hop as a whole - is timed with a span that records into a
+# fixed-bucket histogram:
+#
+#     with span('preprocess'):
+#         X = preprocessor.transform(rows)
+#
+# An observation is a perf_counter pair, a bisect and a locked increment
+# (about a microsecond), so spans stay on in production. render() writes
+# every histogram, counter and registered collector in the Prometheus text
+# format for the /metrics endpoint. Metrics are per process: with several
+# gunicorn workers each one reports its own numbers.
+#
+# sampled() gates per-request log lines so only LOG_SAMPLE_RATE of requests
+# pay for formatting and writing them.
+
+import functools
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from 100 us to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.01))
+
+_metrics = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Timer:
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labelvalues):
+        """Context manager that observes the time spent in its block."""
+        return _Timer(self, labelvalues)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {value}" for labels, value in values)
+        return lines
+
+
+def register_collector(collect):
+    """Add a callable returning [(name, type, help, {label tuple: value}, labelnames)] read at scrape time."""
+    _collectors.append(collect)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, documentation, values, labelnames in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_labels(labelnames, labels)} {value}" for labels, value in values.items())
+    return '\n'.join(lines) + '\n'
+
+
+STAGE_SECONDS = Histogram('wapi_stage_seconds', "Time spent in each serving stage", ['stage'])
+MODEL_SECONDS = Histogram('wapi_model_predict_seconds', "Time per model predict call", ['model'])
+REQUEST_SECONDS = Histogram('wapi_request_seconds', "HTTP request latency by endpoint", ['endpoint'])
+REQUESTS = Counter('wapi_requests_total', "HTTP requests by endpoint and status", ['endpoint', 'status'])
+
+
+def span(stage):
+    """Time a block as ``stage`` in wapi_stage_seconds."""
+    return STAGE_SECONDS.time(stage)
+
+
+def timed(stage):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def sampled():
+    """True for LOG_SAMPLE_RATE of calls; guards per-request log lines."""
+    return LOG_SAMPLE_RATE >= 1 or random.random() < LOG_SAMPLE_RATE
@@ -0,0 +1,394 @@
+# src/api/model_registry.py
+#
+# One place that owns the trained models and preprocessing artifacts.
+#
+# Every artifact is loaded at most once per process, on first use, so the API,
+# the USSD flow and the dashboard share the same objects instead of each
+# unpickling their own copy at import time. Artifacts are opened with joblib's
+# mmap_mode where possible: large numpy arrays stored uncompressed in the pickle
+# are then mapped read-only from disk and shared between forked workers.
+#
+# The artifacts form a ModelBundle: one directory with every model, the
+# preprocessor and the label encoder, optionally with a manifest.json giving
+# the bundle's version and each file's SHA-256 (write one with
+# `python -m src.api.model_registry DIR --version VERSION`). One bundle is
+# active at a time. reload() loads a new bundle to the side - checksums
+# verified, every artifact unpickled, caller-supplied warm-up run - and then
+# swaps it in with a single assignment. Code that makes several model calls
+# for one answer runs inside pinned(), so it finishes on the bundle it started
+# with even if a swap lands halfway through; the old bundle is freed when the
+# last of those calls is done.
+#
+# To deploy a new version without a restart, write it to a new directory,
+# point MODEL_DIR's symlink at it and signal the process (see
+# install_reload_signal) or call the admin reload endpoint.
+
+import argparse
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.environ.get('MODEL_DIR', base_path)
+MANIFEST = 'manifest.json'
+
+# Registry name -> pickle file in MODEL_DIR
+ARTIFACTS = {
+    'rf_regressor': 'random_forest_regressor.pkl',
+    'xgb_regressor': 'xgboost_regressor.pkl',
+    'hybrid_regressor': 'hybrid_regressor.pkl',
+    'rf_classifier': 'random_forest_classifier.pkl',
+    'xgb_classifier': 'xgboost_classifier.pkl',
+    'hybrid_classifier': 'hybrid_classifier.pkl',
+    'preprocessor': 'preprocessor.pkl',
+    'label_encoder': 'label_encoder.pkl',
+}
+
+MMAP_MODE = os.environ.get('MODEL_MMAP_MODE', 'r') or None
+
+# Signal that makes a serving process reload its bundle in the background
+MODEL_RELOAD_SIGNAL = os.environ.get('MODEL_RELOAD_SIGNAL', 'SIGHUP')
+
+
+_MISSING = object()
+
+
+class BundleError(ValueError):
+    """A bundle's files don't match its manifest."""
+
+
+class ModelBundle:
+    """The artifacts in one directory, loaded lazily, plus state derived from them."""
+
+    def __init__(self, directory):
+        # Resolve symlinks now so later loads can't pick up a different version
+        self.directory = os.path.realpath(directory)
+        self.manifest = _read_manifest(self.directory)
+        self.loaded_at = None
+        self._models = {}
+        self._stats = {}
+        self._derived = {}
+        self._lock = threading.RLock()
+        self._version = self.manifest.get('version') if self.manifest else None
+
+    @property
+    def version(self):
+        if self._version is None:
+            # No manifest: name the bundle after its contents
+            self._version = f"unversioned-{_directory_digest(self.directory)[:12]}"
+        return self._version
+
+    def files(self):
+        """Registry name -> {'file', 'sha256'} for every artifact in the bundle."""
+        if self.manifest:
+            return self.manifest['artifacts']
+        return {name: {'file': file} for name, file in ARTIFACTS.items()}
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def preload(self, names=None):
+        for name in names or self.files():
+            self.get(name)
+
+    def derived(self, key, build):
+        """State computed from this bundle's artifacts (compiled forests, plans...), built once."""
+        value = self._derived.get(key, _MISSING)
+        if value is _MISSING:
+            with self._lock:
+                if key not in self._derived:
+                    self._derived[key] = build()
+                value = self._derived[key]
+        return value
+
+    def peek(self, key):
+        """Derived state under ``key`` if it has been built, else None."""
+        value = self._derived.get(key, _MISSING)
+        return None if value is _MISSING else value
+
+    def resident(self):
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _load(self, name):
+        files = self.files()
+        if name not in files:
+            raise KeyError(f"Unknown model '{name}'. Known models: {', '.join(files)}")
+
+        entry = files[name]
+        path = os.path.join(self.directory, entry['file'])
+        expected = entry.get('sha256')
+        if expected is not None and _file_sha256(path) != expected:
+            raise BundleError(f"{path} does not match the checksum in {MANIFEST}")
+
+        start = time.perf_counter()
+        model = joblib.load(path, mmap_mode=MMAP_MODE)
+        elapsed = time.perf_counter() - start
+
+        heap_bytes, mapped_bytes = _estimate_nbytes(model)
+        self._stats[name] = {
+            'path': path,
+            'type': type(model).__name__,
+            'load_seconds': round(elapsed, 4),
+            'heap_bytes': heap_bytes,
+            'mapped_bytes': mapped_bytes,
+        }
+        logger.info(f"Loaded {name} from {path} in {elapsed:.3f}s "
+                    f"({heap_bytes / 1e6:.1f} MB heap, {mapped_bytes / 1e6:.1f} MB memory-mapped)")
+        return model
+
+
+_active = None
+_active_lock = threading.Lock()
+_pinned = contextvars.ContextVar('model_bundle', default=None)
+_reload_hooks = []
+_reload_lock = threading.Lock()
+_reload_status = {'loading': False, 'last_error': None, 'last_reload': None}
+
+
+def current():
+    """The bundle pinned for this request, else the active one."""
+    bundle = _pinned.get()
+    if bundle is not None:
+        return bundle
+    return active()
+
+
+def active():
+    """The bundle new requests start on, ignoring any pin."""
+    if _active is None:
+        _activate_default()
+    return _active
+
+
+def _activate_default():
+    global _active
+    with _active_lock:
+        if _active is None:
+            _active = ModelBundle(MODEL_DIR)
+
+
+@contextmanager
+def pinned(bundle=None):
+    """Use ``bundle`` (the current one by default) for every model lookup in this block."""
+    bundle = bundle or current()
+    token = _pinned.set(bundle)
+    try:
+        yield bundle
+    finally:
+        _pinned.reset(token)
+
+
+def get_model(name):
+    """Return the artifact registered as ``name``, loading it on first use."""
+    return current().get(name)
+
+
+def preload(names=None):
+    """Load the given artifacts (all of them by default) ahead of the first request."""
+    current().preload(names)
+
+
+def resident_models():
+    """Describe every artifact currently held in memory by this process."""
+    return current().resident()
+
+
+def on_reload(hook):
+    """Register a callable to run after a new bundle is swapped in, e.g. to invalidate derived caches."""
+    _reload_hooks.append(hook)
+
+
+def reload(directory=None, prepare=None):
+    """Load the bundle in ``directory`` (MODEL_DIR by default) and make it the active one.
+
+    ``prepare`` runs with the new bundle pinned before the swap, to warm it
+    up; if it or any load fails, the old bundle stays active.
+    """
+    global _active
+    bundle = ModelBundle(directory or MODEL_DIR)
+    bundle.preload()
+    if prepare is not None:
+        with pinned(bundle):
+            prepare()
+    bundle.loaded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    with _active_lock:
+        previous = _active
+        _active = bundle
+    logger.info(f"Swapped in model bundle {bundle.version} from {bundle.directory}"
+                + (f" (was {previous.version})" if previous is not None else ""))
+    for hook in _reload_hooks:
+        hook()
+    return bundle
+
+
+def reload_in_background(directory=None, prepare=None):
+    """Start reload() on a thread; returns False if a reload is already running."""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    _reload_status['loading'] = True
+    threading.Thread(target=_reload_worker, args=(directory, prepare), name='model-reload', daemon=True).start()
+    return True
+
+
+def _reload_worker(directory, prepare):
+    try:
+        bundle = reload(directory, prepare)
+        _reload_status.update(last_error=None, last_reload=bundle.loaded_at)
+    except Exception as e:
+        logger.exception("Model reload failed; keeping the current bundle")
+        _reload_status['last_error'] = f"{type(e).__name__}: {e}"
+    finally:
+        _reload_status['loading'] = False
+        _reload_lock.release()
+
+
+def reload_status():
+    bundle = active()
+    return {'version': bundle.version, 'directory': bundle.directory, 'pid': os.getpid(), **_reload_status}
+
+
+def on_disk_version(directory=None):
+    """Version of the bundle MODEL_DIR (or ``directory``) currently points at."""
+    return ModelBundle(directory or MODEL_DIR).version
+
+
+def install_reload_signal(prepare=None, signame=MODEL_RELOAD_SIGNAL):
+    """Reload in the background whenever this process receives ``signame``.
+
+    Signal handlers can only be set from the main thread; elsewhere (e.g. under
+    a test client) this logs and returns False.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        logger.info(f"Not on the main thread; {signame} won't reload the models")
+        return False
+    signal.signal(getattr(signal, signame), lambda signum, frame: reload_in_background(prepare=prepare))
+    return True
+
+
+def _read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    if 'version' not in manifest or 'artifacts' not in manifest:
+        raise BundleError(f"{path} needs 'version' and 'artifacts'")
+    return manifest
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _directory_digest(directory):
+    digest = hashlib.sha256()
+    for name, file in sorted(ARTIFACTS.items()):
+        path = os.path.join(directory, file)
+        if os.path.exists(path):
+            digest.update(f"{name}:{_file_sha256(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def write_manifest(directory, version):
+    """Checksum the artifacts in ``directory`` into its manifest.json."""
+    artifacts = {}
+    for name, file in ARTIFACTS.items():
+        path = os.path.join(directory, file)
+        if os.path.exists(path):
+            artifacts[name] = {'file': file, 'sha256': _file_sha256(path)}
+    manifest = {
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'artifacts': artifacts,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _estimate_nbytes(obj):
+    """Roughly size an unpickled model as (private heap bytes, memory-mapped bytes).
+
+    Walks containers, instance state and numpy arrays. Memory-mapped arrays are
+    reported separately since their pages are shared between processes.
+    """
+    heap = 0
+    mapped = 0
+    # Keep references to everything visited so temporary pickle states can't recycle ids
+    seen = {}
+    stack = [obj]
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen[id(item)] = item
+
+        if isinstance(item, np.ndarray):
+            if isinstance(item, np.memmap) or isinstance(item.base, np.memmap):
+                mapped += item.nbytes
+            elif isinstance(item.base, np.ndarray):
+                # A view: size the array that owns the buffer instead
+                stack.append(item.base)
+            else:
+                heap += item.nbytes
+            if item.dtype == object:
+                stack.extend(item.ravel())
+            continue
+
+        heap += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            # Extension types (sklearn trees, xgboost boosters) expose their
+            # buffers through their pickle state rather than __dict__
+            try:
+                state = item.__getstate__()
+            except Exception:
+                state = getattr(item, '__dict__', None)
+            if state is not None:
+                stack.append(state)
+
+    return heap, mapped
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Write a model bundle manifest with artifact checksums.")
+    parser.add_argument('directory', help="Directory holding the .pkl artifacts")
+    parser.add_argument('--version', required=True, help="Version name to tag responses with")
+    args = parser.parse_args()
+
+    manifest = write_manifest(args.directory, args.version)
+    print(f"Wrote {MANIFEST} for {len(manifest['artifacts'])} artifacts, version {args.version}")
@@ -1,17 +1,13 @@
 # src/api/utils.py
 
 import pandas as pd
-import joblib
-
-# Load the preprocessor and label encoder
-preprocessor = joblib.load('src/api/preprocessor.pkl')
-label_encoder = joblib.load('src/api/label_encoder.pkl')
+from src.api.model_registry import get_model
 
 def preprocess_features(features):
     # Convert features to DataFrame
     df = pd.DataFrame([features])
 
     # Preprocess the features
-    df_processed = preprocessor.transform(df)
+    df_processed = get_model('preprocessor').transform(df)
 
-    return df_processed
\ No newline at end of file
+    return df_processed
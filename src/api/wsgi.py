@@ -0,0 +1,57 @@
+# src/api/wsgi.py
+#
+# Serving entry point for gunicorn.
+#
+# gunicorn.conf.py sets preload_app, so create_app() runs once in the master:
+# every model, the preprocessor and the USSD dataset are loaded there and the
+# workers inherit them copy-on-write when they fork. Each worker then runs
+# init_worker() before it accepts traffic, so the first real request doesn't
+# pay for lazy initialization inside sklearn/xgboost.
+#
+# Models are hot-reloaded per worker (see model_registry.py). Send SIGHUP to
+# the workers (`pkill -HUP -P <master pid>`) to have each one load the bundle
+# MODEL_DIR points at in the background and swap it in. SIGHUP to the master
+# instead makes gunicorn replace the workers; the new ones load that bundle
+# before serving, while the old ones finish their requests.
+
+import gc
+import logging
+
+from src.api import model_registry
+from src.api.app import app
+from src.api.inference import prepare_bundle, warm_up
+from src.api.model_registry import preload
+
+logger = logging.getLogger(__name__)
+
+
+def init_worker():
+    """Per-worker start-up, run from gunicorn's post_worker_init hook."""
+    # A worker forked from a master that predates the current bundle (or that
+    # replaces a worker which had hot-reloaded) loads the current one first
+    if model_registry.on_disk_version() != model_registry.active().version:
+        model_registry.reload(prepare=prepare_bundle)
+    else:
+        # Thread pools inside sklearn/xgboost don't survive fork; exercise
+        # every model in the new worker
+        warm_up()
+    model_registry.install_reload_signal(prepare_bundle)
+
+
+def create_app():
+    preload()
+
+    # The USSD route imports its module (and the dataset) lazily; do it up front
+    # so the workers share it too. The API can still serve without the dataset.
+    try:
+        import src.ussd.ussd_app  # noqa: F401
+    except Exception:
+        logger.exception("Could not preload the USSD module; /ussd will load it on first use")
+
+    names = warm_up()
+    logger.info(f"Warmed up preprocessor and {len(names)} models from bundle {model_registry.active().version}")
+
+    # Move everything loaded so far out of the GC's reach so collections in the
+    # workers don't touch (and un-share) these pages
+    gc.freeze()
+    return app
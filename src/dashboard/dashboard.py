@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import joblib
 import numpy as np
 import os
+import sys
+
+# Streamlit only puts this script's folder on the path; add the repo root for the src package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.dashboard.data_layer import default_data, load_models, uploaded_data
+from src.dashboard.ingest import SchemaError
+from src.dashboard.plotting import MAX_TABLE_ROWS, binned_scatter, category_counts, stacked_bar
 
 st.set_page_config(layout="wide")
 st.title('📊 Wapi Daktari Healthcare Dashboard')
@@ -12,63 +18,66 @@ st.title('📊 Wapi Daktari Healthcare Dashboard')
 st.sidebar.header("Upload Your CSV")
 uploaded_file = st.sidebar.file_uploader("Upload healthcare data CSV", type="csv")
 
-# Load default dataset or uploaded
-if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-else:
-    file_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'wapi_daktari_healthcare_dataset.csv')
-    df = pd.read_csv(file_path)
-
-# Ensure date format
-df['date'] = pd.to_datetime(df['date'])
-
-# Load preprocessor and encoder
-preprocessor_path = os.path.join(os.path.dirname(__file__), '..', 'api', 'preprocessor.pkl')
-label_encoder_path = os.path.join(os.path.dirname(__file__), '..', 'api', 'label_encoder.pkl')
+# Load default dataset (typed columnar copy when present) or uploaded CSV; both are
+# cached across reruns, so widget changes don't reload anything
+try:
+    data = uploaded_data(uploaded_file) if uploaded_file else default_data()
+except SchemaError as e:
+    st.error(str(e))
+    st.stop()
 
-preprocessor = joblib.load(preprocessor_path)
-label_encoder = joblib.load(label_encoder_path)
+# Load preprocessor and encoder from the shared model registry
+preprocessor, label_encoder = load_models()
 
 # Sidebar filters
-hospital = st.sidebar.selectbox('Select Hospital', df['hospital_name'].unique())
-department = st.sidebar.selectbox('Select Department', df['department'].unique())
+hospitals = st.sidebar.multiselect('Select Hospitals', data.hospitals, default=data.hospitals[:1])
+departments = st.sidebar.multiselect('Select Departments', data.departments, default=data.departments[:1])
 
-min_date = df['date'].min().date()
-max_date = df['date'].max().date()
+min_date = data.min_date
+max_date = data.max_date
 default_date = min_date
 
-date_picker = st.sidebar.date_input('Select Date', value=default_date, min_value=min_date, max_value=max_date)
+date_range = st.sidebar.date_input('Select Dates', value=(default_date, default_date),
+                                   min_value=min_date, max_value=max_date)
+# While a range is being picked the widget holds only its first date
+start_date, end_date = (date_range[0], date_range[-1]) if isinstance(date_range, tuple) else (date_range, date_range)
 
-filtered_data = df[
-    (df['hospital_name'] == hospital) &
-    (df['department'] == department) &
-    (df['date'].dt.date == date_picker)
-]
+if not hospitals or not departments:
+    st.warning("Select at least one hospital and one department.")
+    st.stop()
+
+filtered_data = data.select(hospitals, departments, start_date, end_date)
+# Per-time_block aggregates for the selection
+block_stats = data.block_stats(hospitals, departments, start_date, end_date)
 
-st.write(f"### Showing data for **{hospital} – {department}** on **{date_picker}**")
+date_label = f"{start_date}" if start_date == end_date else f"{start_date} to {end_date}"
+st.write(f"### Showing data for **{', '.join(hospitals)} – {', '.join(departments)}** on **{date_label}**")
 st.write(f"Total rows: **{filtered_data.shape[0]}**")
 
 if filtered_data.empty:
-    st.warning("No data for this hospital, department, and date. Try a different filter.")
+    st.warning("No data for these hospitals, departments, and dates. Try a different filter.")
     st.stop()
 
 with st.expander("View Filtered Data"):
-    st.dataframe(filtered_data)
+    if len(filtered_data) > MAX_TABLE_ROWS:
+        st.caption(f"Showing the first {MAX_TABLE_ROWS:,} of {len(filtered_data):,} rows")
+    st.dataframe(filtered_data.head(MAX_TABLE_ROWS))
 
 if st.sidebar.button("🔁 Reset Filters"):
     st.experimental_rerun()
 
-# Clean & Process
-filtered_data['doctor_available'] = filtered_data['doctor_available'].apply(lambda x: 1 if str(x).lower() == 'yes' else 0)
-filtered_data['waiting_time_minutes'] = pd.to_numeric(filtered_data['waiting_time_minutes'], errors='coerce')
-filtered_data.dropna(subset=['waiting_time_minutes'], inplace=True)
+# Clean & Process - into a new frame: the selection is shared with the data layer's cache
+filtered_data = filtered_data.assign(
+    doctor_available=filtered_data['doctor_available'].astype(int),
+    waiting_time_minutes=pd.to_numeric(filtered_data['waiting_time_minutes'], errors='coerce'),
+).dropna(subset=['waiting_time_minutes'])
 
 # VISUALS
 
 #Waiting Time Distribution
 st.subheader("Waiting Time Distribution")
-waiting_time_summary = filtered_data.groupby('time_block')['waiting_time_minutes'].mean().reset_index()
-fig = px.bar(waiting_time_summary, x='time_block', y='waiting_time_minutes', title="Average Waiting Time by Time Block")
+fig = px.bar(block_stats, x='time_block', y='waiting_time_minutes_mean', title="Average Waiting Time by Time Block",
+             labels={'waiting_time_minutes_mean': 'waiting_time_minutes'})
 st.plotly_chart(fig, use_container_width=True)
 
 if not filtered_data.empty:
@@ -78,26 +87,26 @@ else:
     st.write("**Predicted Avg. Waiting Time:** No data available.")
 
 st.subheader("Congestion Level")
-fig = px.histogram(filtered_data, x='congestion_level', title="Congestion Level Distribution")
+fig = category_counts(filtered_data, 'congestion_level', title="Congestion Level Distribution")
 st.plotly_chart(fig, use_container_width=True)
 mode_cong = filtered_data['congestion_level'].mode()[0]
 predicted_cong = mode_cong if mode_cong in label_encoder.classes_ else "Unknown"
 st.write(f"**Predicted Congestion Level:** {predicted_cong}")
 
 st.subheader("Expected Walk-Ins")
-fig = px.bar(filtered_data, x='time_block', y='expected_walk_ins', color='day_of_week', title="Expected Walk-Ins by Time")
+fig = stacked_bar(filtered_data, 'time_block', 'expected_walk_ins', 'day_of_week', title="Expected Walk-Ins by Time")
 st.plotly_chart(fig, use_container_width=True)
-st.write(f"**Total Expected Walk-Ins:** {filtered_data['expected_walk_ins'].sum()} patients")
+st.write(f"**Total Expected Walk-Ins:** {block_stats['expected_walk_ins_sum'].sum():.0f} patients")
 
 st.subheader("Doctor Availability")
-fig = px.bar(filtered_data, x='time_block', y='doctor_available', color='day_of_week', title="Doctor Availability by Time Block")
+fig = stacked_bar(filtered_data, 'time_block', 'doctor_available', 'day_of_week', title="Doctor Availability by Time Block")
 st.plotly_chart(fig, use_container_width=True)
 doc_mean = filtered_data['doctor_available'].mean()
 st.write(f"**Doctor Status:** {'Available' if doc_mean > 0 else 'Not Available'}")
 
 st.subheader("Patient Load Ratio")
-load_ratio_summary = filtered_data.groupby('time_block')['patient_load_ratio'].mean().reset_index()
-fig = px.bar(load_ratio_summary, x='time_block', y='patient_load_ratio', title="Patient Load Ratio by Time Block")
+fig = px.bar(block_stats, x='time_block', y='patient_load_ratio_mean', title="Patient Load Ratio by Time Block",
+             labels={'patient_load_ratio_mean': 'patient_load_ratio'})
 st.plotly_chart(fig, use_container_width=True)
 
 if not filtered_data.empty:
@@ -107,8 +116,8 @@ else:
     st.write("**Avg. Load Ratio:** No data available.")
 
 st.subheader("Doctor to Patient Ratio")
-doc_patient_summary = filtered_data.groupby('time_block')['doctor_patient_ratio'].mean().reset_index()
-fig = px.bar(doc_patient_summary, x='time_block', y='doctor_patient_ratio', title="Doctor to Patient Ratio by Time Block")
+fig = px.bar(block_stats, x='time_block', y='doctor_patient_ratio_mean', title="Doctor to Patient Ratio by Time Block",
+             labels={'doctor_patient_ratio_mean': 'doctor_patient_ratio'})
 st.plotly_chart(fig, use_container_width=True)
 
 if not filtered_data.empty:
@@ -118,13 +127,14 @@ else:
     st.write("**Avg. Doc/Patient Ratio:** No data available.")
 
 st.subheader("Emergencies & Seasonal Illnesses")
-fig = px.line(filtered_data, x='time_block', y=['emergencies', 'seasonal_illnesses'], markers=True)
+fig = px.line(block_stats, x='time_block', y=['emergencies_sum', 'seasonal_illnesses_sum'], markers=True,
+              labels={'value': 'cases', 'variable': ''})
 st.plotly_chart(fig, use_container_width=True)
-st.write(f"**Emergencies:** {filtered_data['emergencies'].sum()}")
-st.write(f"**Seasonal Illnesses:** {filtered_data['seasonal_illnesses'].sum()}")
+st.write(f"**Emergencies:** {block_stats['emergencies_sum'].sum():.0f}")
+st.write(f"**Seasonal Illnesses:** {block_stats['seasonal_illnesses_sum'].sum():.0f}")
 
 st.subheader("Weather Impact")
-fig = px.scatter(filtered_data, x='temperature', y='actual_patients', color='humidity')
+fig = binned_scatter(filtered_data, 'temperature', 'actual_patients', 'humidity')
 st.plotly_chart(fig, use_container_width=True)
 
 if not filtered_data.empty:
@@ -136,6 +146,16 @@ else:
     st.write("**Avg. Temperature:** No data available.")
     st.write("**Avg. Humidity:** No data available.")
 
+# Trends across all hospitals, from the weekly/monthly rollups (no raw rows scanned)
+st.subheader("Trends Across Hospitals")
+trend_rollup = st.selectbox("Period", ['monthly', 'weekly'])
+trend_measure = st.selectbox("Measure", ['waiting_time_minutes', 'patient_load_ratio', 'doctor_patient_ratio',
+                                         'actual_patients', 'emergencies'])
+trend = data.rollups.trend(trend_rollup, trend_measure)
+fig = px.line(trend, x='period', y=trend_measure, color='hospital_name', markers=True,
+              title=f"Average {trend_measure} per {trend_rollup[:-2]} period")
+st.plotly_chart(fig, use_container_width=True)
+
 # Input Form
 st.subheader('Please Input Hospital Records')
 with st.form("input_form"):
@@ -0,0 +1,120 @@
+# src/dashboard/data_layer.py
+#
+# Cached data layer for the Streamlit dashboard.
+#
+# Streamlit re-executes dashboard.py from the top on every widget change.
+# Everything here is cached across those reruns: the typed dataset is loaded
+# once (uploads are keyed on Streamlit's file_id, which costs nothing to read
+# on a rerun, unlike hashing the whole upload), and the rows of every (hospital, department, date) group are
+# indexed up front so a filter change is a dictionary lookup instead of a
+# boolean scan over the whole frame. The chart aggregates come from a
+# RollupCube built alongside (see rollups.py). Uploads above the streaming
+# threshold go through ingest.StreamedUpload instead of being loaded whole.
+
+import itertools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.api.model_registry import get_model
+from src.dashboard.ingest import StreamedUpload, should_stream
+from src.dashboard.rollups import RollupCube
+from src.dataset import load_dataset, read_csv
+
+# Columns the dashboard actually uses
+DASHBOARD_COLUMNS = [
+    'hospital_name', 'department', 'date', 'day_of_week', 'time_block',
+    'waiting_time_minutes', 'congestion_level', 'expected_walk_ins', 'doctor_available',
+    'patient_load_ratio', 'doctor_patient_ratio', 'emergencies', 'seasonal_illnesses',
+    'actual_patients', 'temperature', 'humidity',
+]
+
+
+class DashboardData:
+    """A loaded dataset, the row positions of each (hospital, department, date) group and its rollups.
+
+    Shared between reruns and sessions, so callers must treat ``df`` as read-only.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.groups = df.groupby(
+            [df['hospital_name'], df['department'], df['date'].dt.date], observed=True, sort=False).indices
+        self.hospitals = list(df['hospital_name'].unique())
+        self.departments = list(df['department'].unique())
+        self.min_date = df['date'].min().date()
+        self.max_date = df['date'].max().date()
+        self.rollups = RollupCube.from_frame(df)
+
+    def select(self, hospitals, departments, start, end):
+        """Rows for the given hospitals and departments between two dates, inclusive."""
+        days = pd.date_range(start, end).date
+        found = [self.groups[key] for key in itertools.product(hospitals, departments, days) if key in self.groups]
+        positions = np.sort(np.concatenate(found)) if found else []
+        return self.df.iloc[positions]
+
+    def block_stats(self, hospitals, departments, start, end):
+        """Per-time_block aggregates for the selection, from the precomputed rollups."""
+        return self.rollups.blocks(hospitals, departments, start, end)
+
+
+def upload_key(uploaded_file):
+    # A new file_id per upload, so a replaced file never reuses stale data;
+    # older Streamlit versions without file_id fall back to name and size
+    file_id = getattr(uploaded_file, 'file_id', None)
+    return file_id if file_id is not None else f"{uploaded_file.name}:{uploaded_file.size}"
+
+
+# cache_resource hands every rerun the same object rather than a pickled
+# copy, which matters for a frame this size
+@st.cache_resource(show_spinner="Loading dataset...")
+def default_data():
+    return DashboardData(load_dataset(columns=DASHBOARD_COLUMNS))
+
+
+@st.cache_resource(show_spinner="Loading uploaded file...", max_entries=4)
+def _uploaded_data(key, _uploaded_file):
+    # Cached on ``key`` only; the leading underscore keeps Streamlit from hashing the file itself
+    _uploaded_file.seek(0)
+    return DashboardData(read_csv(_uploaded_file, columns=DASHBOARD_COLUMNS))
+
+
+@st.cache_resource
+def _streamed_uploads():
+    # key -> StreamedUpload, and the lock guarding it: the dict is shared by
+    # every session. Filled outside any cached function so the progress bar is
+    # drawn live rather than replayed from the cache.
+    return OrderedDict(), threading.Lock()
+
+
+def uploaded_data(uploaded_file, max_streamed=2):
+    key = upload_key(uploaded_file)
+    if not should_stream(uploaded_file):
+        return _uploaded_data(key, uploaded_file)
+
+    streamed, lock = _streamed_uploads()
+    with lock:
+        upload = streamed.get(key)
+        if upload is not None:
+            streamed.move_to_end(key)
+            return upload
+
+    # Read without the lock, so other sessions aren't held up for the whole pass
+    bar = st.progress(0.0, text=f"Reading {uploaded_file.name} in chunks...")
+    upload = StreamedUpload(uploaded_file, DASHBOARD_COLUMNS, progress=bar.progress)
+    bar.empty()
+    with lock:
+        upload = streamed.setdefault(key, upload)
+        streamed.move_to_end(key)
+        while len(streamed) > max_streamed:
+            streamed.popitem(last=False)
+    return upload
+
+
+@st.cache_resource
+def load_models():
+    """The preprocessor and label encoder, from the shared model registry."""
+    return get_model('preprocessor'), get_model('label_encoder')
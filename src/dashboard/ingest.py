@@ -0,0 +1,144 @@
+# src/dashboard/ingest.py
+#
+# Streaming ingestion for large uploaded CSVs.
+#
+# Reading a multi-year, multi-facility export with a single pd.read_csv call
+# holds the whole frame (plus parser buffers) in memory at once.
+# StreamedUpload reads the upload in chunks of CHUNK_ROWS rows with explicit
+# dtypes and keeps only what the dashboard needs:
+#
+#   - the weekly/monthly rollups of the whole file (for the trend views)
+#   - the hospital/department lists and date range for the sidebar filters
+#   - the raw rows of the current hospitals/departments/date-range selection,
+#     collected by a second chunked pass and cached for the last few selections
+#     (up to SLICE_CACHE_SIZE of them and SLICE_CACHE_MB in all); the
+#     per-time_block charts are aggregated from that slice
+#
+# Memory ceiling: one parsed chunk of DASHBOARD_COLUMNS (~120 bytes/row, so
+# ~12 MB at the default 100k rows, a few times that while pandas parses and
+# aggregates it), plus the period rollups (~250 bytes per hospital x
+# department x week, well under 10 MB for years of data), plus at most
+# SLICE_CACHE_MB of cached slices. The base cube is not kept: at one row per
+# key it would be as large as the file. The uploaded bytes themselves are
+# held by Streamlit and bounded by its server.maxUploadSize setting.
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.dashboard.rollups import RollupCube
+from src.dataset import COLUMNS, CSV_DTYPES, normalize
+
+CHUNK_ROWS = int(os.environ.get('DASHBOARD_CHUNK_ROWS', 100_000))
+# Uploads larger than this are streamed instead of loaded whole
+STREAMING_THRESHOLD_MB = float(os.environ.get('DASHBOARD_STREAMING_MB', 50))
+SLICE_CACHE_SIZE = 8
+# Byte budget for those cached slices; a wide date range over every facility
+# can be as large as the file, and is then returned without being cached
+SLICE_CACHE_MB = float(os.environ.get('DASHBOARD_SLICE_CACHE_MB', 64))
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def validate_header(buffer):
+    """Check that the CSV in ``buffer`` has every dataset column; rewinds the buffer."""
+    buffer.seek(0)
+    header = list(pd.read_csv(buffer, nrows=0).columns)
+    buffer.seek(0)
+    missing = [c for c in COLUMNS if c not in header]
+    if missing:
+        raise SchemaError(f"Uploaded CSV is missing {len(missing)} of the {len(COLUMNS)} expected columns: "
+                          f"{', '.join(missing)}")
+    return header
+
+
+def iter_chunks(buffer, columns, chunk_rows=CHUNK_ROWS):
+    """Yield typed chunks of ``columns`` from the CSV in ``buffer``."""
+    buffer.seek(0)
+    dtypes = {c: t for c, t in CSV_DTYPES.items() if c in columns}
+    reader = pd.read_csv(buffer, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+    rows_read = 0
+    try:
+        for chunk in reader:
+            yield normalize(chunk)
+            rows_read += len(chunk)
+    except (ValueError, TypeError) as e:
+        raise SchemaError(f"Bad values after row {rows_read}: {e}") from e
+
+
+class StreamedUpload:
+    """Dashboard data for an upload that is never held in memory as one frame.
+
+    Exposes the same attributes as data_layer.DashboardData.
+    """
+
+    def __init__(self, buffer, columns, chunk_rows=CHUNK_ROWS, progress=None):
+        self.buffer = buffer
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self.rollups = RollupCube(keep_base=False)
+        # selection key -> (rows, their size in bytes)
+        self._slices = OrderedDict()
+        self._slice_bytes = 0
+        # One instance is shared by every session viewing the upload; passes over the buffer can't interleave
+        self._lock = threading.Lock()
+
+        validate_header(buffer)
+        size = max(getattr(buffer, 'size', 0) or len(buffer.getvalue()), 1)
+        hospitals, departments = {}, {}
+        min_date = max_date = None
+
+        for chunk in iter_chunks(buffer, columns, chunk_rows):
+            self.rollups.update(chunk)
+            # dicts keep first-seen order, like Series.unique()
+            hospitals.update(dict.fromkeys(chunk['hospital_name'].unique()))
+            departments.update(dict.fromkeys(chunk['department'].unique()))
+            lo, hi = chunk['date'].min(), chunk['date'].max()
+            min_date = lo if min_date is None else min(min_date, lo)
+            max_date = hi if max_date is None else max(max_date, hi)
+            if progress:
+                progress(min(buffer.tell() / size, 1.0))
+
+        if min_date is None:
+            raise SchemaError("Uploaded CSV has no rows")
+        self.hospitals = list(hospitals)
+        self.departments = list(departments)
+        self.min_date = min_date.date()
+        self.max_date = max_date.date()
+
+    def select(self, hospitals, departments, start, end):
+        """Rows for the given hospitals and departments between two dates, read with another chunked pass."""
+        key = (tuple(hospitals), tuple(departments), start, end)
+        with self._lock:
+            if key in self._slices:
+                self._slices.move_to_end(key)
+                return self._slices[key][0]
+
+            first, last = pd.Timestamp(start), pd.Timestamp(end)
+            parts = [chunk[chunk['hospital_name'].isin(hospitals) & chunk['department'].isin(departments) &
+                           chunk['date'].between(first, last)]
+                     for chunk in iter_chunks(self.buffer, self.columns, self.chunk_rows)]
+            selection = pd.concat(parts, ignore_index=True)
+
+            nbytes = int(selection.memory_usage(index=True, deep=True).sum())
+            budget = SLICE_CACHE_MB * 1024 * 1024
+            if nbytes <= budget:
+                self._slices[key] = (selection, nbytes)
+                self._slice_bytes += nbytes
+                while len(self._slices) > SLICE_CACHE_SIZE or self._slice_bytes > budget:
+                    _, (_, evicted) = self._slices.popitem(last=False)
+                    self._slice_bytes -= evicted
+            return selection
+
+    def block_stats(self, hospitals, departments, start, end):
+        """Per-time_block aggregates for the selection, from its slice."""
+        selection = self.select(hospitals, departments, start, end)
+        return RollupCube.from_frame(selection).blocks(hospitals, departments, start, end)
+
+
+def should_stream(uploaded_file):
+    return uploaded_file.size > STREAMING_THRESHOLD_MB * 1024 * 1024
@@ -0,0 +1,62 @@
+# src/dashboard/plotting.py
+#
+# Chart builders that keep the browser payload bounded.
+#
+# Plotly Express serializes every row it is given into the page. With the
+# date-range and multi-select filters a selection can span hundreds of
+# thousands of rows, so above POINT_BUDGET rows these helpers aggregate on
+# the server first: stacked bars are summed per bar segment (the bars look
+# the same), category histograms become pre-counted bars, and the weather
+# scatter becomes a 2D histogram whose cells carry the row count and the
+# mean of the colour column.
+
+import os
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+POINT_BUDGET = int(os.environ.get('DASHBOARD_POINT_BUDGET', 5000))
+MAX_TABLE_ROWS = int(os.environ.get('DASHBOARD_MAX_TABLE_ROWS', 1000))
+
+
+def stacked_bar(df, x, y, color, title, budget=POINT_BUDGET):
+    """px.bar of ``y`` by ``x`` stacked by ``color``, summed per segment above ``budget`` rows."""
+    if len(df) > budget:
+        df = df.groupby([x, color], observed=True, as_index=False)[y].sum()
+    return px.bar(df, x=x, y=y, color=color, title=title)
+
+
+def category_counts(df, column, title):
+    """Bar chart of how often each value of ``column`` occurs (a pre-counted px.histogram)."""
+    counts = df[column].value_counts().rename('count').rename_axis(column).reset_index()
+    return px.bar(counts, x=column, y='count', title=title)
+
+
+def binned_scatter(df, x, y, color, budget=POINT_BUDGET, title=None):
+    """px.scatter of ``x`` vs ``y`` coloured by ``color``; a 2D histogram above ``budget`` rows."""
+    if len(df) <= budget:
+        return px.scatter(df, x=x, y=y, color=color, title=title)
+
+    # bins x bins cells stay within the budget
+    bins = int(np.clip(np.sqrt(budget), 10, 100))
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    sums, _, _ = np.histogram2d(xs, ys, bins=[x_edges, y_edges], weights=df[color].to_numpy(dtype=np.float64))
+    means = np.divide(sums, counts, out=np.full_like(sums, np.nan), where=counts > 0)
+
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        # histogram2d is indexed [x, y]; Heatmap wants rows = y
+        z=np.where(counts > 0, counts, np.nan).T,
+        customdata=means.T,
+        colorscale='Viridis',
+        colorbar={'title': 'rows'},
+        hovertemplate=(f"{x}: %{{x:.1f}}<br>{y}: %{{y:.0f}}<br>rows: %{{z}}"
+                       f"<br>mean {color}: %{{customdata:.1f}}<extra></extra>"),
+    ))
+    fig.update_layout(title=title or f"{len(df):,} rows binned into {bins}x{bins} cells",
+                      xaxis_title=x, yaxis_title=y)
+    return fig
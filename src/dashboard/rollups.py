@@ -0,0 +1,142 @@
+# src/dashboard/rollups.py
+#
+# Pre-aggregated rollups of the healthcare dataset for the dashboard charts.
+#
+# The base cube holds count, sum, min and max of each measure per
+# hospital x department x date x time_block; weekly and monthly rollups of it
+# (per hospital x department x period) back the trend views. Means are derived
+# as sum / count when queried. Every statistic kept here merges associatively,
+# so new rows are folded in by aggregating just those rows and combining the
+# partial result into the existing tables - the raw rows are never rescanned.
+#
+#     cube = RollupCube.from_frame(df)
+#     cube.update(new_rows)
+#     cube.day('KNH', 'Surgery', date)          per-time_block stats for one day
+#     cube.blocks(hospitals, departments, start, end)
+#     cube.trend('monthly', 'waiting_time_minutes')
+
+import pandas as pd
+
+KEYS = ['hospital_name', 'department', 'date', 'time_block']
+MEASURES = [
+    'waiting_time_minutes', 'patient_load_ratio', 'doctor_patient_ratio', 'expected_walk_ins',
+    'emergencies', 'seasonal_illnesses', 'actual_patients', 'doctor_available',
+]
+STATS = ['sum', 'min', 'max']
+
+# Rollup name -> pandas period frequency
+FREQUENCIES = {'weekly': 'W', 'monthly': 'M'}
+ROLLUP_KEYS = ['hospital_name', 'department', 'period']
+
+# How each stored column merges with another partial aggregate of the same group
+MERGE_RULES = {'count': 'sum', **{f'{m}_{s}': 'sum' if s == 'sum' else s for m in MEASURES for s in STATS}}
+
+
+def aggregate(df, keys=KEYS):
+    """Aggregate raw rows (any frame with ``keys`` and MEASURES) into cube rows."""
+    values = df[MEASURES].astype('float64')
+    grouped = values.groupby([df[k] for k in keys], observed=True, sort=False)
+    out = grouped.agg(STATS)
+    out.columns = [f'{m}_{s}' for m, s in out.columns]
+    out.insert(0, 'count', grouped.size().astype('int64'))
+    return out
+
+
+def merge(*parts):
+    """Combine partial aggregates; groups present in several parts are merged with MERGE_RULES."""
+    parts = [p for p in parts if p is not None and len(p)]
+    if not parts:
+        return None
+    combined = pd.concat(parts) if len(parts) > 1 else parts[0]
+    levels = list(range(combined.index.nlevels))
+    return combined.groupby(level=levels, observed=True).agg(MERGE_RULES)
+
+
+def roll_up(cube, freq):
+    """Re-aggregate base cube rows to hospital x department x ``freq`` period."""
+    frame = cube.reset_index()
+    frame['period'] = frame['date'].dt.to_period(freq).dt.start_time
+    return frame.groupby(ROLLUP_KEYS, observed=True).agg(MERGE_RULES)
+
+
+def with_means(frame):
+    """Add a ``<measure>_mean`` column for every measure."""
+    frame = frame.copy()
+    for m in MEASURES:
+        frame[f'{m}_mean'] = frame[f'{m}_sum'] / frame['count']
+    return frame
+
+
+def _empty_blocks():
+    return pd.DataFrame(columns=list(MERGE_RULES), index=pd.Index([], name='time_block'), dtype='float64')
+
+
+class RollupCube:
+    def __init__(self, keep_base=True):
+        # The base cube is about as large as the raw rows when each key has a
+        # single row; streamed uploads skip it and keep only the period rollups
+        self.keep_base = keep_base
+        self.base = None
+        self.rollups = {name: None for name in FREQUENCIES}
+        self.rows = 0
+
+    @classmethod
+    def from_frame(cls, df, keep_base=True):
+        cube = cls(keep_base)
+        cube.update(df)
+        return cube
+
+    def update(self, df):
+        """Fold newly arrived raw rows into the base cube and every rollup."""
+        if df.empty:
+            return self
+        partial = aggregate(df)
+        if self.keep_base:
+            self.base = merge(self.base, partial)
+        for name, freq in FREQUENCIES.items():
+            self.rollups[name] = merge(self.rollups[name], roll_up(partial, freq))
+        self.rows += len(df)
+        return self
+
+    def day(self, hospital, department, date):
+        """Per-time_block stats (with means) for one hospital, department and date."""
+        try:
+            frame = self.base.xs((hospital, department, pd.Timestamp(date)), level=[0, 1, 2])
+        except (KeyError, AttributeError):
+            frame = _empty_blocks()
+        return with_means(frame).reset_index()
+
+    def blocks(self, hospitals, departments, start, end):
+        """Per-time_block stats (with means) over several hospitals/departments and a date range."""
+        if len(hospitals) == 1 and len(departments) == 1 and start == end:
+            return self.day(hospitals[0], departments[0], start)
+        if self.base is None:
+            return with_means(_empty_blocks()).reset_index()
+        index = self.base.index
+        dates = index.get_level_values('date')
+        mask = (index.get_level_values('hospital_name').isin(hospitals) &
+                index.get_level_values('department').isin(departments) &
+                (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end)))
+        frame = self.base[mask].groupby(level='time_block', observed=True).agg(MERGE_RULES)
+        return with_means(frame).reset_index()
+
+    def trend(self, rollup, measure, stat='mean', by='hospital_name'):
+        """``stat`` of ``measure`` per ``rollup`` period, one series per value of ``by``.
+
+        Returns a long frame with columns [by, 'period', measure], ready for px.line.
+        """
+        table = self.rollups[rollup]
+        if table is None:
+            return pd.DataFrame(columns=[by, 'period', measure])
+        grouped = table.groupby(level=[by, 'period'], observed=True).agg(MERGE_RULES)
+        if stat == 'mean':
+            values = grouped[f'{measure}_sum'] / grouped['count']
+        elif stat == 'count':
+            values = grouped['count']
+        else:
+            values = grouped[f'{measure}_{stat}']
+        return values.rename(measure).reset_index()
+
+    def nbytes(self):
+        tables = [self.base, *self.rollups.values()]
+        return sum(int(t.memory_usage(deep=True).sum()) for t in tables if t is not None)
@@ -0,0 +1,199 @@
+# src/dataset.py
+#
+# Typed, columnar storage for the healthcare dataset.
+#
+# Parsing the 46-column CSV (string dates, 'True'/'False' and 'Yes'/'No'
+# flags) on every process start is slow and memory-heavy. This module
+# converts it once into a Parquet file with real dtypes - categoricals for
+# the low-cardinality text columns, datetime for `date`, booleans for the
+# flags - and loads only the columns a caller asks for.
+#
+#     python -m src.dataset              convert the CSV to Parquet
+#     python -m src.dataset --compare    measure load time / peak RSS of both formats
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(base_path, '..', 'data')
+DATASET_CSV = os.environ.get('WAPI_DATASET_CSV', os.path.join(DATA_DIR, 'wapi_daktari_healthcare_dataset.csv'))
+DATASET_PARQUET = os.environ.get('WAPI_DATASET_PARQUET', os.path.splitext(DATASET_CSV)[0] + '.parquet')
+
+COLUMNS = [
+    'hospital_name', 'date', 'day_of_week', 'is_weekend', 'is_holiday',
+    'is_strike_day', 'department', 'time_block', 'doctors_on_shift',
+    'expected_patients', 'actual_patients', 'waiting_time_minutes',
+    'peak_hour', 'doctor_available', 'doctor_arrival_delay', 'congestion_level',
+    'month', 'day', 'patient_load_ratio', 'doctor_patient_ratio',
+    'holiday_strike_interaction', 'expected_walk_ins', 'emergencies',
+    'seasonal_illnesses', 'public_holidays_events', 'hour_of_day', 'day_of_month',
+    'quarter', 'season', 'previous_day_patients', 'previous_week_patients',
+    'previous_month_patients', 'temperature', 'humidity', 'rainfall',
+    'school_holidays', 'national_events', 'average_waiting_time_last_week', 'average_patients_last_month',
+    'previous_day_waiting_time', 'previous_week_waiting_time', 'previous_month_waiting_time',
+    'doctors_on_shift_expected_patients', 'doctor_patient_ratio_congestion_level',
+    'flu_season', 'malaria_season'
+]
+
+CATEGORICAL_COLUMNS = ['hospital_name', 'department', 'time_block', 'season', 'congestion_level']
+BOOL_COLUMNS = ['is_weekend', 'is_holiday', 'is_strike_day']
+YES_NO_COLUMNS = ['peak_hour', 'doctor_available']
+FLOAT_COLUMNS = [
+    'patient_load_ratio', 'doctor_patient_ratio', 'temperature', 'humidity', 'rainfall',
+    'doctor_patient_ratio_congestion_level',
+]
+INT_COLUMNS = [c for c in COLUMNS
+               if c not in CATEGORICAL_COLUMNS + BOOL_COLUMNS + YES_NO_COLUMNS + FLOAT_COLUMNS + ['date']]
+
+# dtypes for pd.read_csv; 'date' and the Yes/No flags are converted after parsing
+CSV_DTYPES = {
+    **{c: 'category' for c in CATEGORICAL_COLUMNS},
+    **{c: 'bool' for c in BOOL_COLUMNS},
+    **{c: 'category' for c in YES_NO_COLUMNS},
+    **{c: 'float64' for c in FLOAT_COLUMNS},
+    **{c: 'int64' for c in INT_COLUMNS},
+}
+
+
+def normalize(df):
+    """Give a freshly parsed frame the dataset's dtypes (works on any subset of COLUMNS)."""
+    for column in df.columns:
+        if column == 'date':
+            df[column] = pd.to_datetime(df[column])
+        elif column in YES_NO_COLUMNS:
+            if df[column].dtype != bool:
+                df[column] = df[column].astype(str).str.lower().eq('yes')
+        elif column in CSV_DTYPES and df[column].dtype != CSV_DTYPES[column]:
+            df[column] = df[column].astype(CSV_DTYPES[column])
+    return df
+
+
+def to_model_inputs(df):
+    """Undo the typed representation where the preprocessor expects the training encoding.
+
+    The preprocessor was fitted on the raw CSV, so its one-hot encoder expects
+    'Yes'/'No' strings for the Yes/No flags.
+    """
+    df = df.copy()
+    for column in YES_NO_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map({True: 'Yes', False: 'No'})
+    return df
+
+
+def read_csv(path_or_buffer=DATASET_CSV, columns=None, **kwargs):
+    """Read a dataset CSV with explicit dtypes, keeping only ``columns``."""
+    dtypes = {c: t for c, t in CSV_DTYPES.items() if columns is None or c in columns}
+    df = pd.read_csv(path_or_buffer, usecols=columns, dtype=dtypes, **kwargs)
+    return normalize(df)
+
+
+def convert_csv(csv_path=DATASET_CSV, parquet_path=DATASET_PARQUET):
+    """Write the typed Parquet copy of the CSV."""
+    df = read_csv(csv_path)
+    tmp_path = f"{parquet_path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+
+def load_dataset(columns=None):
+    """Load the dataset (optionally only ``columns``), preferring the Parquet copy.
+
+    Falls back to parsing the CSV when the Parquet file is missing, older than
+    the CSV, or pyarrow isn't installed.
+    """
+    parquet_fresh = os.path.exists(DATASET_PARQUET) and (
+        not os.path.exists(DATASET_CSV) or os.path.getmtime(DATASET_PARQUET) >= os.path.getmtime(DATASET_CSV))
+    if parquet_fresh:
+        try:
+            return read_parquet(DATASET_PARQUET, columns=columns)
+        except ImportError:
+            pass
+    return read_csv(DATASET_CSV, columns=columns)
+
+
+def read_parquet(path=DATASET_PARQUET, columns=None):
+    import pyarrow.parquet as pq
+
+    # Memory-map the file and release Arrow buffers while converting, so the
+    # peak footprint stays close to the final DataFrame rather than double it
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_manifest(manifest_path, columns=None, workers=None):
+    """Load a sharded dataset written by generate_dataset.py --shards, reading shards in parallel."""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    shard_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = [os.path.join(shard_dir, shard['path']) for shard in manifest['shards']]
+
+    def read_shard(path):
+        if manifest['format'] == 'parquet':
+            return normalize(read_parquet(path, columns=columns))
+        return read_csv(path, columns=columns)
+
+    # pyarrow and the pandas CSV parser release the GIL, so threads read shards concurrently
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(read_shard, paths))
+
+    df = pd.concat(frames, ignore_index=True)
+    # Shards see different category sets; re-categorize on the combined frame
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns and df[column].dtype != 'category':
+            df[column] = df[column].astype('category')
+    return df
+
+
+def _measure(fmt, columns):
+    """Load the dataset in a fresh interpreter and report (seconds, peak RSS in MB)."""
+    script = f"""
+import json, resource, time
+import pandas as pd
+columns = {columns!r}
+if {fmt!r} == 'parquet':
+    import pyarrow.parquet  # library load is a fixed cost, not part of the data
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {fmt!r} == 'csv':
+    from src.dataset import read_csv, DATASET_CSV
+    df = read_csv(DATASET_CSV, columns=columns)
+elif {fmt!r} == 'csv-untyped':
+    from src.dataset import DATASET_CSV
+    df = pd.read_csv(DATASET_CSV, usecols=columns)
+else:
+    from src.dataset import read_parquet, DATASET_PARQUET
+    df = read_parquet(DATASET_PARQUET, columns=columns)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps([elapsed, (peak - baseline) / 1024, df.memory_usage(deep=True).sum() / 1e6]))
+"""
+    root = os.path.join(base_path, '..')
+    output = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def compare(columns=None):
+    print(f"{'format':<14}{'load (s)':>10}{'peak RSS +MB':>14}{'frame MB':>10}")
+    for fmt in ['csv-untyped', 'csv', 'parquet']:
+        elapsed, rss, frame = _measure(fmt, columns)
+        print(f"{fmt:<14}{elapsed:>10.3f}{rss:>14.1f}{frame:>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert the healthcare dataset CSV to typed Parquet.")
+    parser.add_argument('--compare', action='store_true', help="Compare CSV vs Parquet load time and memory")
+    parser.add_argument('--columns', help="Comma-separated subset of columns to load when comparing")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.columns.split(',') if args.columns else None)
+    else:
+        print(f"Wrote {convert_csv()}")
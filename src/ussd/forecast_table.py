@@ -0,0 +1,148 @@
+# src/ussd/forecast_table.py
+#
+# Precomputed best-time forecasts for the USSD flow.
+#
+# The USSD gateway only gives us a few seconds per hop, so instead of running
+# predict_best_time on the final step we materialize
+# (hospital, department, date) -> (best time block, waiting minutes, congestion)
+# for a rolling window of dates ahead of time and look the answer up at
+# request time.
+#
+# Refresh the table (e.g. from a daily cron job) with:
+#
+#     python -m src.ussd.forecast_table --days 14
+#
+# Running servers pick up the new file on their next lookup: ForecastTable
+# compares the file's mtime/inode on every read and reloads when it changed.
+#
+# Each row records the version of the model bundle that produced it. A row is
+# served only to a request running on that same version, so after a model
+# reload the table is bypassed until it has been rebuilt with the new models.
+
+import argparse
+import csv
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TABLE_PATH = os.path.join(base_path, '..', '..', 'data', 'best_time_forecast.csv')
+FORECAST_TABLE_PATH = os.environ.get('FORECAST_TABLE_PATH', DEFAULT_TABLE_PATH)
+
+COLUMNS = ['hospital_name', 'department', 'date', 'best_time', 'waiting_time_minutes', 'congestion_level',
+           'model_version']
+
+
+def load_forecast_table(path=FORECAST_TABLE_PATH):
+    """Load the forecast table into a dict of (hospital, department, 'YYYY-MM-DD') -> (model version, forecast).
+
+    A missing table is not an error: the USSD flow then falls back to live
+    inference for every request. Neither is a table written before rows
+    carried a model version; none of its rows will be served.
+    """
+    table = {}
+    if not os.path.exists(path):
+        logger.info(f"No forecast table at {path}; using live inference only")
+        return table
+
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            key = (row['hospital_name'], row['department'], row['date'])
+            forecast = (row['best_time'], float(row['waiting_time_minutes']), row['congestion_level'])
+            table[key] = (row.get('model_version'), forecast)
+
+    logger.info(f"Loaded {len(table)} precomputed forecasts from {path}")
+    return table
+
+
+class ForecastTable:
+    """The table at ``path``, reloaded whenever the file is replaced or removed."""
+
+    def __init__(self, path=FORECAST_TABLE_PATH):
+        self.path = path
+        self._stamp = None
+        self._table = {}
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # build_forecast_table replaces the file, so the inode changes too
+        return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+    def _current(self):
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._table = load_forecast_table(self.path)
+                    self._stamp = stamp
+        return self._table
+
+    def invalidate(self):
+        """Drop the loaded rows; the next lookup reads the file again."""
+        with self._lock:
+            self._table = {}
+            self._stamp = None
+
+    def get(self, key, version):
+        """The forecast for ``key`` if the table has one made by model bundle ``version``."""
+        entry = self._current().get(key)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def __len__(self):
+        return len(self._current())
+
+
+def build_forecast_table(start_date, days, path=FORECAST_TABLE_PATH):
+    """Run predict_best_time for every hospital/department over the date window and write the table."""
+    # Imported here so that loading the table never pulls in the models
+    from src.api.model_registry import pinned
+    from src.ussd.ussd_app import HOSPITALS, DEPARTMENTS, predict_best_time
+
+    rows = []
+    skipped = 0
+    # Every row from one bundle, even if a reload happens mid-build
+    with pinned() as bundle:
+        for offset in range(days):
+            date_obj = start_date + timedelta(days=offset)
+            for hospital_name in HOSPITALS:
+                for department in DEPARTMENTS:
+                    try:
+                        best_time, waiting_time, congestion = predict_best_time(hospital_name, department, date_obj)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    rows.append([hospital_name, department, date_obj.strftime('%Y-%m-%d'),
+                                 best_time, f"{waiting_time:.2f}", congestion, bundle.version])
+
+    # Write to a temporary file first so a running server never reads a half-written table
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote {len(rows)} forecasts for model version {bundle.version} to {path} "
+                f"({skipped} combinations had no data)")
+    return len(rows)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Precompute best-time forecasts for the USSD flow.")
+    parser.add_argument('--start', help="First date of the window (YYYY-MM-DD, default today)")
+    parser.add_argument('--days', type=int, default=14, help="Number of days to precompute (default 14)")
+    parser.add_argument('--output', default=FORECAST_TABLE_PATH, help="Where to write the table")
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, '%Y-%m-%d') if args.start else datetime.now()
+    build_forecast_table(start, args.days, args.output)
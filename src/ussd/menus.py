@@ -0,0 +1,97 @@
+# src/ussd/menus.py
+#
+# Prerendered USSD screens.
+#
+# Every static screen (language select, main menu, hospital and department
+# lists, date entry) is rendered once per language when the module that owns
+# the translations starts up; the date menu, which shows actual dates, is
+# rendered once per day. A hop then just picks a string.
+#
+# USSD gateways show at most MAX_CHARS characters per screen. Option lists
+# that don't fit are split into pages: each page keeps the global option
+# numbers and ends with "98. More" (next page) and "0. Back" (previous page,
+# or the previous screen from the first page).
+
+import threading
+from datetime import datetime, timedelta
+
+MAX_CHARS = 182
+MORE = '98'
+
+
+def paginate(title, options, footer, more, max_chars=MAX_CHARS):
+    """Split numbered ``options`` under ``title`` into screens of at most ``max_chars``.
+
+    ``footer`` ends every page; pages with a following page also get ``more``.
+    """
+    lines = [f"{i + 1}. {option}" for i, option in enumerate(options)]
+    pages = []
+    start = 0
+    while True:
+        # Take as many options as fit, assuming a "More" line is needed...
+        end = start
+        while end < len(lines) and len(_page(title, lines[start:end + 1], [more, footer])) <= max_chars:
+            end += 1
+        # ...and drop it on the last page, where everything left may now fit
+        if len(_page(title, lines[start:], [footer])) <= max_chars:
+            pages.append(_page(title, lines[start:], [footer]))
+            return pages
+        if end == start:
+            raise ValueError(f"Menu option {lines[start]!r} does not fit on a {max_chars}-character screen")
+        pages.append(_page(title, lines[start:end], [more, footer]))
+        start = end
+
+
+def _page(title, lines, footer):
+    return f"{title}\n" + "\n".join(lines) + "\n\n" + "\n".join(footer)
+
+
+def _checked(screen, max_chars=MAX_CHARS):
+    if len(screen) > max_chars:
+        raise ValueError(f"USSD screen is {len(screen)} characters, over the {max_chars} limit: {screen!r}")
+    return screen
+
+
+class Menus:
+    """Every USSD screen for every language in ``translations``, rendered ahead of time."""
+
+    def __init__(self, translations, hospitals, departments, max_chars=MAX_CHARS):
+        self.translations = translations
+        self.max_chars = max_chars
+        self.language_select = {}
+        self.main = {}
+        self.hospitals = {}
+        self.departments = {}
+        self.enter_date = {}
+
+        for lang, t in translations.items():
+            self.language_select[lang] = _checked(t['language_select'], max_chars)
+            self.main[lang] = _checked(f"{t['welcome']}\n{t['main_menu']}", max_chars)
+            self.hospitals[lang] = paginate(t['select_hospital'], hospitals, t['back'], t['more'], max_chars)
+            self.departments[lang] = paginate(t['select_department'], departments, t['back'], t['more'], max_chars)
+            self.enter_date[lang] = _checked(f"{t['enter_date']}\n\n{t['back']}", max_chars)
+
+        self._dates = (None, {})
+        self._dates_lock = threading.Lock()
+
+    def date(self, lang, today=None):
+        """The date menu for ``lang``, rendered once per day."""
+        today = today or datetime.now().date()
+        day, menus = self._dates
+        if day != today:
+            with self._dates_lock:
+                day, menus = self._dates
+                if day != today:
+                    menus = {lang: self._render_date(lang, today) for lang in self.translations}
+                    self._dates = (today, menus)
+        return menus[lang]
+
+    def _render_date(self, lang, today):
+        t = self.translations[lang]
+        options = (
+            f"1. {t['today']} ({today.strftime('%Y-%m-%d')})\n"
+            f"2. {t['tomorrow']} ({(today + timedelta(days=1)).strftime('%Y-%m-%d')})\n"
+            f"3. {t['day_after_tomorrow']} ({(today + timedelta(days=2)).strftime('%Y-%m-%d')})\n"
+            f"4. {t['enter_specific_date']}"
+        )
+        return _checked(f"{t['select_date']}\n{options}\n\n{t['back']}", self.max_chars)
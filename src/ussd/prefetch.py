@@ -0,0 +1,91 @@
+# src/ussd/prefetch.py
+#
+# Speculative prefetch of USSD predictions.
+#
+# Once a user has picked a hospital and department, the date menu offers
+# today, tomorrow and the day after. Between that screen and the user's
+# answer there is a full network round trip, so the handler queues all three
+# predictions on a small thread pool; by the time the answer arrives the
+# chosen one is usually done.
+#
+# The number of queued-or-running predictions is capped at
+# PREFETCH_QUEUE_SIZE - beyond that, prefetches are skipped rather than
+# queued, so a burst of sessions can't build an unbounded backlog - and a
+# session's queued predictions are cancelled when it ends.
+#
+# Worker threads start on the first submit, so a gunicorn master that only
+# imports this module forks no threads into its workers.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.api import metrics
+
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', 2))
+PREFETCH_QUEUE_SIZE = int(os.environ.get('PREFETCH_QUEUE_SIZE', 64))
+
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS, max_pending=PREFETCH_QUEUE_SIZE):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ussd-prefetch')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self.used = 0
+
+    def submit(self, fn, *args):
+        """Run ``fn(*args)`` in the background; returns a Future, or None when the queue is full."""
+        with self._lock:
+            if self.max_pending <= 0 or self._pending >= self.max_pending:
+                self.skipped += 1
+                return None
+            self._pending += 1
+            self.submitted += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def cancel(self, futures):
+        """Cancel the futures that haven't started yet."""
+        cancelled = sum(1 for future in futures if future.cancel())
+        with self._lock:
+            self.cancelled += cancelled
+
+    def mark_used(self):
+        with self._lock:
+            self.used += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self._executor._max_workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'submitted': self.submitted,
+                'skipped': self.skipped,
+                'cancelled': self.cancelled,
+                'used': self.used,
+            }
+
+
+prefetcher = Prefetcher()
+
+
+def _collect():
+    stats = prefetcher.stats()
+    return [
+        ('wapi_ussd_prefetch_pending', 'gauge', "USSD predictions queued or running", {(): stats['pending']}, ()),
+        ('wapi_ussd_prefetch_total', 'counter', "USSD prefetches by outcome",
+         {(outcome,): stats[outcome] for outcome in ('submitted', 'skipped', 'cancelled', 'used')}, ('outcome',)),
+    ]
+
+
+metrics.register_collector(_collect)
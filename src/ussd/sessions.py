@@ -0,0 +1,104 @@
+# src/ussd/sessions.py
+#
+# Per-session state for the USSD flow.
+#
+# The gateway sends the whole input chain ("1*2*3") on every hop. Instead of
+# re-splitting and re-interpreting it each time, the handler keeps a Session
+# per sessionId - language, current screen, chosen hospital/department and
+# any prefetched predictions - and only interprets the newest input.
+#
+# Sessions live in a CacheBackend (see src/api/cache.py): in-process by
+# default, or a shared store so any worker can continue a session. Only the
+# navigation state is stored there; prefetched predictions are futures and
+# stay with the process that started them.
+
+import os
+import threading
+import weakref
+
+from src.api import metrics
+from src.api.cache import InProcessBackend
+
+USSD_SESSION_TTL = float(os.environ.get('USSD_SESSION_TTL', 180))
+USSD_MAX_SESSIONS = int(os.environ.get('USSD_MAX_SESSIONS', 10000))
+
+
+class Session:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.lang = 'en'
+        self.screen = 'language'
+        # Page of a paginated menu screen
+        self.page = 0
+        self.hospital = None
+        self.department = None
+        # The input chain handled so far and the reply it got, to spot the
+        # next input (and gateway retries of the same one)
+        self.text = ''
+        self.last_response = None
+        # date string -> Future of lookup_best_time
+        self.predictions = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['predictions'] = {}
+        return state
+
+    def new_inputs(self, text):
+        """Inputs in ``text`` not handled yet, or None if it doesn't continue this session's chain."""
+        if text == self.text:
+            return []
+        # Several inputs at once when other workers handled the hops in between
+        if not self.text:
+            return text.split('*')
+        prefix = self.text + '*'
+        if text.startswith(prefix):
+            return text[len(prefix):].split('*')
+        return None
+
+
+class SessionStore:
+    def __init__(self, backend):
+        self.backend = backend
+        # One lock per live sessionId: the in-process backend hands every
+        # request the same Session object, so a gateway retry racing the
+        # original hop would otherwise advance it twice
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def _key(session_id):
+        return f"ussd-session:{session_id}"
+
+    def lock(self, session_id):
+        """The lock serialising hops of ``session_id`` in this process; hold it across get/save."""
+        with self._locks_lock:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = threading.Lock()
+            return lock
+
+    def get(self, session_id):
+        return self.backend.get(self._key(session_id))
+
+    def save(self, session):
+        self.backend.set(self._key(session.session_id), session)
+
+    def discard(self, session):
+        self.backend.delete(self._key(session.session_id))
+
+    def __len__(self):
+        return len(self.backend)
+
+
+sessions = SessionStore(InProcessBackend(maxsize=USSD_MAX_SESSIONS, ttl=USSD_SESSION_TTL))
+
+
+metrics.register_collector(lambda: [
+    ('wapi_ussd_sessions', 'gauge', "USSD sessions held by this process's session store", {(): len(sessions)}, ()),
+])
+
+
+def set_backend(backend):
+    """Swap the session storage, e.g. for one shared between workers."""
+    sessions.backend = backend
@@ -1,35 +1,51 @@
-import traceback
 from flask import Flask, request
-import joblib
-import pandas as pd
 from datetime import datetime, timedelta
 import numpy as np
 import logging
 import os
-import sklearn
+from src.api import inference
+from src.api.cache import response_cache
+from src.api.frozen_preprocessor import frozen_preprocessor
+from src.api.metrics import sampled, span, timed
+from src.api import model_registry
+from src.api.model_registry import get_model, pinned
+from src.dataset import load_dataset, to_model_inputs
+from src.ussd.forecast_table import ForecastTable
+from src.ussd.menus import MORE, Menus
+from src.ussd.prefetch import prefetcher
+from src.ussd.sessions import Session, sessions
 app = Flask(__name__)
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
-# Load models and preprocessor
-base_path = os.path.dirname(os.path.abspath(__file__))
-rf_regressor = joblib.load(os.path.join(base_path, '..', 'api', 'random_forest_regressor.pkl'))
-xgb_regressor = joblib.load(os.path.join(base_path, '..', 'api', 'xgboost_regressor.pkl'))
-hybrid_regressor = joblib.load(os.path.join(base_path, '..', 'api', 'hybrid_regressor.pkl'))
-rf_classifier = joblib.load(os.path.join(base_path, '..', 'api', 'random_forest_classifier.pkl'))
-xgb_classifier = joblib.load(os.path.join(base_path, '..', 'api', 'xgboost_classifier.pkl'))
-hybrid_classifier = joblib.load(os.path.join(base_path, '..', 'api', 'hybrid_classifier.pkl'))
-preprocessor = joblib.load(os.path.join(base_path, '..', 'api', 'preprocessor.pkl'))
-label_encoder = joblib.load(os.path.join(base_path, '..', 'api', 'label_encoder.pkl'))
-
-# Load the dataset
-df = pd.read_csv(os.path.join(base_path, '..', '..', 'data', 'wapi_daktari_healthcare_dataset.csv'))
+# Load the dataset: only the date plus the model input columns, from the typed columnar copy when present
+df = to_model_inputs(load_dataset(columns=['date'] + frozen_preprocessor().columns))
 
 # Define dropdown values
 HOSPITALS = df['hospital_name'].unique().tolist()
 DEPARTMENTS = df['department'].unique().tolist()
 
+# Index rows by (hospital, department, date, time_block) so lookups don't scan the dataset.
+# setdefault keeps the first matching row, as the old boolean filter did.
+FEATURE_INDEX = {}
+dates = df['date'].dt.strftime('%Y-%m-%d')
+for position, key in enumerate(zip(df['hospital_name'], df['department'], dates, df['time_block'])):
+    FEATURE_INDEX.setdefault(key, position)
+
+# Each row's model inputs as a plain tuple, in the preprocessor's column order
+FEATURE_ROWS = list(df[frozen_preprocessor().columns].itertuples(index=False, name=None))
+
+# Precomputed (hospital, department, date) -> best time forecasts, reloaded when the file changes
+FORECAST = ForecastTable()
+
+def drop_forecasts():
+    # The table's rows belong to the previous bundle; read the file afresh,
+    # in case it has already been rebuilt for the new one
+    FORECAST.invalidate()
+
+model_registry.on_reload(drop_forecasts)
+
 # Define time blocks to evaluate
 TIMEBLOCKS = {
     "Morning": {"hour_of_day": 8},
@@ -47,6 +63,7 @@ TRANSLATIONS = {
         'select_date': "Select Date:",
         'enter_date': "Enter the date (YYYY-MM-DD):",
         'back': "0. Back",
+        'more': "98. More",
         'invalid_input': "Invalid input. Try again.",
         'error_occurred': "An error occurred:",
         'best_time': "Best time to visit",
@@ -68,6 +85,7 @@ TRANSLATIONS = {
         'select_date': "Chagua Tarehe:",
         'enter_date': "Ingiza tarehe (YYYY-MM-DD):",
         'back': "0. Rudi nyuma",
+        'more': "98. Zaidi",
         'invalid_input': "Ingizo batili. Jaribu tena.",
         'error_occurred': "Kosa limetokea:",
         'best_time': "Wakati bora wa kutembelea",
@@ -82,178 +100,241 @@ TRANSLATIONS = {
     }
 }
 
+# Every screen, prerendered per language (paginated to the USSD screen limit)
+MENUS = Menus(TRANSLATIONS, HOSPITALS, DEPARTMENTS)
+
 def get_features(hospital_name, department, date_obj, time_block):
-    # Filter the dataset for the given hospital, department, and date
-    filtered_df = df[(df['hospital_name'] == hospital_name) & 
-                     (df['department'] == department) & 
-                     (df['date'] == date_obj.strftime('%Y-%m-%d')) &
-                     (df['time_block'] == time_block)]
-    
-    if filtered_df.empty:
-        raise ValueError(f"No data available for {hospital_name}, {department} on {date_obj.strftime('%Y-%m-%d')} during {time_block}")
-    
-    # If multiple rows are found, use the first one
-    features = filtered_df.iloc[0].to_dict()
-    
-    # Convert to DataFrame
-    features_df = pd.DataFrame([features])
-    
-    return features_df
+    date_str = date_obj.strftime('%Y-%m-%d')
+    position = FEATURE_INDEX.get((hospital_name, department, date_str, time_block))
+
+    if position is None:
+        raise ValueError(f"No data available for {hospital_name}, {department} on {date_str} during {time_block}")
 
+    return FEATURE_ROWS[position]
+
+@timed('predict_best_time')
 def predict_best_time(hospital_name, department, date_obj):
-    best_time = None
-    min_waiting_time = float('inf')
-    best_congestion = None
+    time_blocks = []
+    rows = []
 
-    for time_block in TIMEBLOCKS.keys():
-        try:
-            features = get_features(hospital_name, department, date_obj, time_block)
-            
-            print(f"Debug: Raw features for {time_block}:")
-            print(features)
-            
-            # Preprocess features
-            X = preprocessor.transform(features)
-            print(f"Debug: Preprocessed features shape for {time_block}: {X.shape}")
-            
-            # Make predictions
-            waiting_time = rf_regressor.predict(X)[0]
-            congestion = rf_classifier.predict(X)[0]
-            print(f"Debug: Predictions for {time_block}: Waiting time = {waiting_time}, Congestion = {congestion}")
-            
-            if waiting_time < min_waiting_time:
-                min_waiting_time = waiting_time
-                best_time = time_block
-                best_congestion = congestion
-        
-        except Exception as e:
-            print(f"Error for {time_block}: {str(e)}")
-            continue
+    with span('features'):
+        for time_block in TIMEBLOCKS.keys():
+            try:
+                rows.append(get_features(hospital_name, department, date_obj, time_block))
+                time_blocks.append(time_block)
+            except Exception as e:
+                logger.debug("Skipping %s: %s", time_block, e)
+                continue
 
-    if best_time is None:
+    if not time_blocks:
         raise ValueError("Unable to make predictions for any time block")
 
+    # Score every available time block in one transform and one predict per model
+    with span('preprocess'):
+        X = frozen_preprocessor().transform(rows)
+    waiting_times, congestions = inference.predict_models(['rf_regressor', 'rf_classifier'], X)
+    logger.debug("Predictions for %s: waiting times %s, congestion %s", time_blocks, waiting_times, congestions)
+
+    # argmin keeps the first time block on ties, like the old strict '<' comparison
+    best = int(np.argmin(waiting_times))
+    best_time = time_blocks[best]
+    min_waiting_time = waiting_times[best]
+    best_congestion = congestions[best]
+
     # Handle the case where the label is not in the encoder
     try:
-        congestion_label = label_encoder.inverse_transform([best_congestion])[0]
+        congestion_label = get_model('label_encoder').inverse_transform([best_congestion])[0]
     except ValueError:
         congestion_label = str(best_congestion)  # Use the raw prediction if it can't be inverse transformed
 
     return best_time, min_waiting_time, congestion_label
 
+def lookup_best_time(hospital_name, department, date_obj):
+    # Serve from the precomputed table, then the response cache, running the models only on a miss
+    date_str = date_obj.strftime('%Y-%m-%d')
+    # One model bundle for the table row, the cache key and the prediction, even mid-reload
+    with pinned() as bundle:
+        forecast = FORECAST.get((hospital_name, department, date_str), bundle.version)
+        if forecast is not None:
+            return forecast
+        return response_cache.get_or_compute(
+            ['best_time', hospital_name, department, date_str],
+            lambda: predict_best_time(hospital_name, department, date_obj))
+
 @app.route("/ussd", methods=["POST"])
 def ussd():
-    logger.info("USSD endpoint hit")
-    session_id = request.form.get("sessionId")
-    phone_number = request.form.get("phoneNumber")
-    text = request.form.get("text")
-    
-    logger.info(f"Received USSD request: SessionID: {session_id}, Phone: {phone_number}, Text: {text}")
-    logger.info(f"Full request data: {request.form}")
-    
-    inputs = text.split("*")
-    step = len(inputs)
-
-    # Default language is English
-    lang = 'en'
-
-    if text == "":
-        return menu(TRANSLATIONS[lang]['language_select'])
-
-    if step == 1:
-        lang = 'en' if inputs[0] == '1' else 'sw'
-        return menu(f"{TRANSLATIONS[lang]['welcome']}\n{TRANSLATIONS[lang]['main_menu']}")
-
-    lang = 'en' if inputs[0] == '1' else 'sw'
-
-    if inputs[1] == "1":
-        if step == 2:
-            hospital_menu = "\n".join([f"{i+1}. {name}" for i, name in enumerate(HOSPITALS)])
-            return menu(f"{TRANSLATIONS[lang]['select_hospital']}\n{hospital_menu}\n\n{TRANSLATIONS[lang]['back']}")
-        elif step == 3:
-            if inputs[2] == "0":
-                return menu(f"{TRANSLATIONS[lang]['welcome']}\n{TRANSLATIONS[lang]['main_menu']}")
-            department_menu = "\n".join([f"{i+1}. {name}" for i, name in enumerate(DEPARTMENTS)])
-            return menu(f"{TRANSLATIONS[lang]['select_department']}\n{department_menu}\n\n{TRANSLATIONS[lang]['back']}")
-        elif step == 4:
-            if inputs[3] == "0":
-                hospital_menu = "\n".join([f"{i+1}. {name}" for i, name in enumerate(HOSPITALS)])
-                return menu(f"{TRANSLATIONS[lang]['select_hospital']}\n{hospital_menu}\n\n{TRANSLATIONS[lang]['back']}")
-            today = datetime.now()
-            date_menu = (
-                f"1. {TRANSLATIONS[lang]['today']} ({today.strftime('%Y-%m-%d')})\n"
-                f"2. {TRANSLATIONS[lang]['tomorrow']} ({(today + timedelta(days=1)).strftime('%Y-%m-%d')})\n"
-                f"3. {TRANSLATIONS[lang]['day_after_tomorrow']} ({(today + timedelta(days=2)).strftime('%Y-%m-%d')})\n"
-                f"4. {TRANSLATIONS[lang]['enter_specific_date']}"
-            )
-            return menu(f"{TRANSLATIONS[lang]['select_date']}\n{date_menu}\n\n{TRANSLATIONS[lang]['back']}")
-        # ... rest of the function ...
-        elif step == 5:
-            if inputs[4] == "0":
-                department_menu = "\n".join([f"{i+1}. {name}" for i, name in enumerate(DEPARTMENTS)])
-                return menu(f"{TRANSLATIONS[lang]['select_department']}\n{department_menu}\n\n{TRANSLATIONS[lang]['back']}")
-            elif inputs[4] == "4":
-                return menu(f"{TRANSLATIONS[lang]['enter_date']}\n\n{TRANSLATIONS[lang]['back']}")
-            else:
-                try:
-                    hospital_name = HOSPITALS[int(inputs[2]) - 1]
-                    department = DEPARTMENTS[int(inputs[3]) - 1]
-                    date_choice = int(inputs[4])
-                    if date_choice == 1:
-                        date_obj = datetime.now()
-                    elif date_choice == 2:
-                        date_obj = datetime.now() + timedelta(days=1)
-                    elif date_choice == 3:
-                        date_obj = datetime.now() + timedelta(days=2)
-                    else:
-                        return end(TRANSLATIONS[lang]['invalid_input'])
-
-                    best_time, waiting_time, congestion = predict_best_time(hospital_name, department, date_obj)
-
-                    response = f"{TRANSLATIONS[lang]['best_time']} {hospital_name} - {department} on {date_obj.strftime('%Y-%m-%d')}:\n"
-                    response += f"{TRANSLATIONS[lang]['time']} {best_time}\n"
-                    response += f"{TRANSLATIONS[lang]['estimated_waiting_time']} {waiting_time:.0f} {TRANSLATIONS[lang]['minutes']}\n"
-                    response += f"{TRANSLATIONS[lang]['expected_congestion']} {congestion}"
-
-                    return end(response)
-                except Exception as e:
-                    error_trace = traceback.format_exc()
-                    print(f"Error occurred: {str(e)}\n{error_trace}")
-                    return end(f"{TRANSLATIONS[lang]['error_occurred']} {str(e)}")
-        elif step == 6:
-            if inputs[5] == "0":
-                today = datetime.now()
-                date_menu = (
-                    f"1. {TRANSLATIONS[lang]['today']} ({today.strftime('%Y-%m-%d')})\n"
-                    f"2. {TRANSLATIONS[lang]['tomorrow']} ({(today + timedelta(days=1)).strftime('%Y-%m-%d')})\n"
-                    f"3. {TRANSLATIONS[lang]['day_after_tomorrow']} ({(today + timedelta(days=2)).strftime('%Y-%m-%d')})\n"
-                    f"4. {TRANSLATIONS[lang]['enter_specific_date']}"
-                )
-                return menu(f"{TRANSLATIONS[lang]['select_date']}\n{date_menu}\n\n{TRANSLATIONS[lang]['back']}")
-            try:
-                hospital_name = HOSPITALS[int(inputs[2]) - 1]
-                department = DEPARTMENTS[int(inputs[3]) - 1]
-                date_obj = datetime.strptime(inputs[5], "%Y-%m-%d")
+    if sampled():
+        logger.info("USSD request data: %s", dict(request.form))
+    return handle_ussd(request.form.get("sessionId"), request.form.get("phoneNumber"), request.form.get("text"))
 
-                best_time, waiting_time, congestion = predict_best_time(hospital_name, department, date_obj)
+@timed('ussd_hop')
+def handle_ussd(session_id, phone_number, text):
+    # Framework-independent USSD handler, shared by the Flask and ASGI apps
+    if sampled():
+        logger.info("Received USSD request: SessionID: %s, Phone: %s, Text: %s", session_id, phone_number, text)
+    text = text or ""
 
-                response = f"{TRANSLATIONS[lang]['best_time']} {hospital_name} - {department} on {date_obj.strftime('%Y-%m-%d')}:\n"
-                response += f"{TRANSLATIONS[lang]['time']} {best_time}\n"
-                response += f"{TRANSLATIONS[lang]['estimated_waiting_time']} {waiting_time:.0f} {TRANSLATIONS[lang]['minutes']}\n"
-                response += f"{TRANSLATIONS[lang]['expected_congestion']} {congestion}"
+    with sessions.lock(session_id):
+        return _handle_hop(session_id, text)
 
-                return end(response)
-            except Exception as e:
-                error_trace = traceback.format_exc()
-                print(f"Error occurred: {str(e)}\n{error_trace}")
-                return end(f"{TRANSLATIONS[lang]['error_occurred']} {str(e)}")
-    elif inputs[1] == "2":
-        # Change language
-        new_lang = 'sw' if lang == 'en' else 'en'
-        return menu(f"{TRANSLATIONS[new_lang]['welcome']}\n{TRANSLATIONS[new_lang]['main_menu']}")
+def _handle_hop(session_id, text):
+    session = None if text == "" else sessions.get(session_id)
+    new_inputs = session.new_inputs(text) if session is not None else None
+    if new_inputs is None:
+        # New session, or one this process has no state for: replay the whole chain
+        session = Session(session_id)
+        new_inputs = text.split("*") if text else []
+
+    response = session.last_response or menu(MENUS.language_select[session.lang])
+    for value in new_inputs:
+        response = advance(session, value)
+        if response.startswith("END"):
+            break
+
+    session.text = text
+    session.last_response = response
+    if response.startswith("END"):
+        prefetcher.cancel(session.predictions.values())
+        sessions.discard(session)
+    else:
+        sessions.save(session)
+    return response
+
+def advance(session, value):
+    # Apply one input to the session's current screen and return the reply
+    lang = session.lang
+    screen = session.screen
+
+    if screen == 'language':
+        session.lang = 'en' if value == '1' else 'sw'
+        session.screen = 'main'
+        return menu(MENUS.main[session.lang])
+
+    if screen == 'main':
+        if value == "1":
+            return show(session, 'hospital')
+        if value == "2":
+            # Change language
+            session.lang = 'sw' if lang == 'en' else 'en'
+            return menu(MENUS.main[session.lang])
+
+    elif screen == 'hospital':
+        paged = turn_page(session, MENUS.hospitals[lang], value)
+        if paged is not None:
+            return paged
+        if value == "0":
+            session.screen = 'main'
+            return menu(MENUS.main[lang])
+        hospital = choose(HOSPITALS, value)
+        if hospital is not None:
+            session.hospital = hospital
+            return show(session, 'department')
+
+    elif screen == 'department':
+        paged = turn_page(session, MENUS.departments[lang], value)
+        if paged is not None:
+            return paged
+        if value == "0":
+            return show(session, 'hospital')
+        department = choose(DEPARTMENTS, value)
+        if department is not None:
+            session.department = department
+            start_prefetch(session)
+            return show(session, 'date')
+
+    elif screen == 'date':
+        if value == "0":
+            return show(session, 'department')
+        if value == "4":
+            return show(session, 'enter_date')
+        if value in ("1", "2", "3"):
+            return answer(session, datetime.now() + timedelta(days=int(value) - 1))
+
+    elif screen == 'enter_date':
+        if value == "0":
+            return show(session, 'date')
+        try:
+            date_obj = datetime.strptime(value, "%Y-%m-%d")
+        except ValueError as e:
+            return end(f"{TRANSLATIONS[lang]['error_occurred']} {str(e)}")
+        return answer(session, date_obj)
 
     return end(TRANSLATIONS[lang]['invalid_input'])
 
+def show(session, screen):
+    # Move to the first page of ``screen`` and return it
+    session.screen = screen
+    session.page = 0
+    lang = session.lang
+    if screen == 'hospital':
+        return menu(MENUS.hospitals[lang][0])
+    if screen == 'department':
+        return menu(MENUS.departments[lang][0])
+    if screen == 'date':
+        return menu(MENUS.date(lang))
+    return menu(MENUS.enter_date[lang])
+
+def turn_page(session, pages, value):
+    # "98" moves to the next page and "0" to the previous one; None if the input isn't paging
+    if value == MORE and session.page + 1 < len(pages):
+        session.page += 1
+    elif value == "0" and session.page > 0:
+        session.page -= 1
+    else:
+        return None
+    return menu(pages[session.page])
+
+def choose(options, value):
+    # The option picked by a 1-based menu number, or None
+    if value.isdigit() and 1 <= int(value) <= len(options):
+        return options[int(value) - 1]
+    return None
+
+def start_prefetch(session):
+    # Start predicting the three dates on the date menu while the user reads it
+    prefetcher.cancel(session.predictions.values())
+    session.predictions = {}
+    today = datetime.now()
+    for days in range(3):
+        date_obj = today + timedelta(days=days)
+        date_str = date_obj.strftime('%Y-%m-%d')
+        if FORECAST.get((session.hospital, session.department, date_str), model_registry.active().version) is not None:
+            continue
+        future = prefetcher.submit(lookup_best_time, session.hospital, session.department, date_obj)
+        if future is not None:
+            session.predictions[date_str] = future
+
+def prefetched_best_time(session, date_obj):
+    # The prefetched answer when there is one in progress or done; else compute it now
+    future = session.predictions.get(date_obj.strftime('%Y-%m-%d'))
+    # A prefetch still waiting in the queue is cancelled and computed here instead
+    if future is None or future.cancel():
+        return lookup_best_time(session.hospital, session.department, date_obj)
+    prefetcher.mark_used()
+    return future.result()
+
+def answer(session, date_obj):
+    lang = session.lang
+    try:
+        best_time, waiting_time, congestion = prefetched_best_time(session, date_obj)
+
+        response = f"{TRANSLATIONS[lang]['best_time']} {session.hospital} - {session.department} on {date_obj.strftime('%Y-%m-%d')}:\n"
+        response += f"{TRANSLATIONS[lang]['time']} {best_time}\n"
+        response += f"{TRANSLATIONS[lang]['estimated_waiting_time']} {waiting_time:.0f} {TRANSLATIONS[lang]['minutes']}\n"
+        response += f"{TRANSLATIONS[lang]['expected_congestion']} {congestion}"
+
+        return end(response)
+    except ValueError as e:
+        # No data for that date is routine; keep it out of the error log
+        if sampled():
+            logger.warning("No best time for %s - %s on %s: %s",
+                           session.hospital, session.department, date_obj.strftime('%Y-%m-%d'), e)
+        return end(f"{TRANSLATIONS[lang]['error_occurred']} {str(e)}")
+    except Exception as e:
+        logger.exception("Best time lookup failed for %s - %s on %s",
+                         session.hospital, session.department, date_obj.strftime('%Y-%m-%d'))
+        return end(f"{TRANSLATIONS[lang]['error_occurred']} {str(e)}")
+
 def menu(response):
     return f"CON {response}"
 
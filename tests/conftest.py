@@ -0,0 +1,56 @@
+# tests/conftest.py
+#
+# Shared fixtures for the test suite:
+#
+#     pip install pytest httpx    # httpx for FastAPI's TestClient
+#     python -m pytest -q
+#
+# Tests that need the trained models or the dataset skip when those files
+# are missing - the larger model pickles and data/ are not in the
+# repository. Input rows come from generatedData/generate_dataset.py with a
+# fixed seed, so every run checks the same values.
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'generatedData'))
+
+from src import dataset  # noqa: E402
+from src.api import model_registry  # noqa: E402
+
+SEED = 1234
+
+
+def require_models(*names):
+    """Skip the calling test unless the artifacts for ``names`` (default: all of them) are in MODEL_DIR."""
+    missing = [model_registry.ARTIFACTS[name] for name in names or model_registry.ARTIFACTS
+               if not os.path.exists(os.path.join(model_registry.MODEL_DIR, model_registry.ARTIFACTS[name]))]
+    if missing:
+        pytest.skip(f"Model artifacts not available: {', '.join(missing)}")
+
+
+def require_dataset():
+    if not any(os.path.exists(path) for path in (dataset.DATASET_PARQUET, dataset.DATASET_CSV)):
+        pytest.skip(f"Dataset not available: {dataset.DATASET_CSV}")
+
+
+@pytest.fixture(scope='session')
+def sample():
+    """A week of generated rows in the preprocessor's input columns."""
+    require_models('preprocessor')
+    from generate_dataset import iter_chunks
+
+    columns = list(model_registry.get_model('preprocessor').feature_names_in_)
+    return next(iter_chunks(seed=SEED, chunk_days=7))[columns].reset_index(drop=True)
+
+
+@pytest.fixture(scope='session')
+def records(sample):
+    """``sample`` as JSON records, the way API clients send them."""
+    # Through json.dumps rather than to_json, which rounds floats to 10 digits
+    return json.loads(json.dumps(sample.to_dict('records'), default=lambda value: value.item()))
@@ -0,0 +1,179 @@
+# tests/test_asgi_parity.py
+#
+# The ASGI app (asgi.py) must serve the same contract as the Flask app
+# (app.py): each request goes through both and the status codes and bodies
+# are compared, error paths included. A 500 is compared by status only - the
+# two frameworks word their internal-error pages differently.
+
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import require_dataset, require_models
+from src.api import asgi, inference
+from src.api.cache import response_cache
+from src.api.model_registry import BundleError
+from src.api.app import app
+
+logging.disable(logging.CRITICAL)
+
+# Routes that answer without models or data
+BASIC = [
+    ('get', '/', {}),
+    ('get', '/test', {}),
+    ('get', '/docs', {}),
+    ('get', '/predict_regression', {}),
+    ('get', '/predict_classification', {}),
+    ('get', '/batching', {}),
+    ('get', '/cache', {}),
+    ('get', '/admin/reload', {}),
+    ('post', '/admin/reload', {}),
+    ('post', '/admin/reload', {'headers': {'X-Admin-Token': 'wrong'}}),
+    ('post', '/predict_regression', {'content': b'{"features": [1, 2'}),
+    ('post', '/predict_classification', {'content': b'not json'}),
+    ('post', '/predict_regression/batch', {'content': b'\xff\xfe'}),
+    ('post', '/predict_classification/batch', {'content': b''}),
+    ('post', '/predict_regression', {'json': [1, 2]}),
+    ('post', '/predict_classification', {'json': 'x'}),
+    ('post', '/predict_regression/batch', {'json': [{'features': [1, 2]}]}),
+    ('get', '/missing', {}),
+]
+
+
+@pytest.fixture(scope='module')
+def clients():
+    # No lifespan: it would shut the inference executor down after the first test
+    return app.test_client(), TestClient(asgi.app, raise_server_exceptions=False)
+
+
+def send(clients, method, path, options):
+    flask_client, asgi_client = clients
+    options = dict(options)
+    flask_options = dict(options)
+    if 'content' in flask_options:
+        flask_options['data'] = flask_options.pop('content')
+    if 'data' in options or 'content' in options:
+        # Flask's force=True reads any body as JSON; send the same bytes to both
+        flask_options.setdefault('content_type', 'application/json')
+        options.setdefault('headers', {})['Content-Type'] = 'application/json'
+
+    flask_response = getattr(flask_client, method)(path, **flask_options)
+    asgi_response = getattr(asgi_client, method)(path, **options)
+    return flask_response, asgi_response
+
+
+def assert_same(flask_response, asgi_response, context=''):
+    assert asgi_response.status_code == flask_response.status_code, context
+    if flask_response.status_code >= 500 or flask_response.status_code == 404:
+        return
+    if flask_response.is_json:
+        assert asgi_response.json() == flask_response.get_json(), context
+    else:
+        assert asgi_response.text == flask_response.get_data(as_text=True), context
+
+
+@pytest.mark.parametrize('method,path,options', BASIC, ids=lambda value: value if isinstance(value, str) else None)
+def test_basic_routes(clients, method, path, options):
+    assert_same(*send(clients, method, path, options))
+
+
+def test_malformed_json_is_a_json_400(clients):
+    flask_response, asgi_response = send(clients, 'post', '/predict_regression', {'content': b'{bad'})
+    assert flask_response.status_code == 400
+    assert flask_response.get_json() == {'error': 'Request body must be valid JSON'}
+    assert_same(flask_response, asgi_response)
+
+
+def test_metrics(clients):
+    # Counters move between the two calls, so only the format is compared
+    flask_response, asgi_response = send(clients, 'get', '/metrics', {})
+    assert asgi_response.status_code == flask_response.status_code == 200
+    assert asgi_response.headers['content-type'].split(';')[0] == flask_response.mimetype == 'text/plain'
+
+
+def prediction_requests(records):
+    row = records[0]
+    return [
+        ('/predict_regression', {'json': {'features': list(row.values())}}),
+        ('/predict_regression', {'json': {'features': row}}),
+        ('/predict_regression?models=hybrid', {'json': {'features': list(row.values())}}),
+        ('/predict_regression', {'json': {'features': list(row.values()), 'models': 'random_forest,xgboost'}}),
+        ('/predict_regression', {'json': {'features': list(row.values()), 'models': ['knn']}}),
+        ('/predict_regression', {'json': {'features': list(row.values()), 'models': []}}),
+        ('/predict_regression', {'json': {'features': list(row.values())[:5]}}),
+        ('/predict_classification', {'json': {'features': list(row.values())}}),
+        ('/predict_regression/batch', {'json': {'records': records[:20]}}),
+        ('/predict_regression/batch', {'json': {'features': [list(r.values()) for r in records[:5]]}}),
+        ('/predict_regression/batch?models=xgboost', {'json': {'records': records[:5]}}),
+        ('/predict_regression/batch', {'json': {'records': []}}),
+        ('/predict_regression/batch', {'json': {'features': [1, 2, 3]}}),
+        ('/predict_regression/batch', {'json': {'rows': []}}),
+        ('/predict_classification/batch', {'json': {'records': records[:5]}}),
+    ]
+
+
+def client_errors(records):
+    row = records[0]
+    partial = {key: value for key, value in row.items() if key != 'hospital_name'}
+    return [
+        ('/predict_regression', {'json': {'nothing': 1}}),
+        ('/predict_regression', {'json': {'rows': row}}),
+        ('/predict_regression', {'json': {'features': 'KNH'}}),
+        ('/predict_regression', {'json': {'features': partial}}),
+        ('/predict_regression', {'json': {'features': list(row.values())[:5]}}),
+        ('/predict_regression', {'json': {'features': {**row, 'temperature': 'warm'}}}),
+        ('/predict_regression', {'json': {'features': list(row.values()), 'models': ['knn']}}),
+        ('/predict_classification', {'json': {'features': list(row.values()), 'models': []}}),
+        ('/predict_regression/batch', {'json': {'records': 'KNH'}}),
+        ('/predict_regression/batch', {'json': {'records': [partial]}}),
+        ('/predict_classification/batch', {'json': {'features': [1, 2, 3]}}),
+    ]
+
+
+def test_client_errors_are_400(clients, records):
+    require_models()
+    for path, options in client_errors(records):
+        flask_response, asgi_response = send(clients, 'post', path, options)
+        assert flask_response.status_code == 400, f"{path} {options}"
+        assert 'error' in flask_response.get_json()
+        assert_same(flask_response, asgi_response, context=f"{path} {options}")
+
+
+@pytest.mark.parametrize('error', [BundleError("checksum mismatch"), ValueError("y contains previously unseen labels")])
+def test_server_faults_are_500(clients, records, monkeypatch, error):
+    # A failing artifact is the server's fault, not a bad request
+    require_models()
+
+    def fail(names, features):
+        raise error
+
+    monkeypatch.setattr(inference, 'predict_models', fail)
+    response_cache.clear()
+    row = records[0]
+    for path, body in [('/predict_regression', {'features': row}), ('/predict_classification/batch', {'records': [row]})]:
+        flask_response, asgi_response = send(clients, 'post', path, {'json': body})
+        assert flask_response.status_code == asgi_response.status_code == 500, path
+
+
+def test_prediction_routes(clients, records):
+    require_models()
+    for path, options in prediction_requests(records):
+        assert_same(*send(clients, 'post', path, options), context=f"{path} {options}")
+    assert_same(*send(clients, 'get', '/models', {}))
+    assert_same(*send(clients, 'get', '/cache', {}))
+
+
+def test_ussd(clients):
+    require_models()
+    require_dataset()
+    flask_client, asgi_client = clients
+    # One session per app: the apps share this process's session store, and a
+    # repeated text for one session would only replay the stored reply
+    for text in ['', '1', '1*1', '1*1*1', '1*1*1*1', '1*1*1*1*1']:
+        form = {'phoneNumber': '+254700000000', 'text': text}
+        flask_response = flask_client.post('/ussd', data={**form, 'sessionId': 'parity-flask'})
+        asgi_response = asgi_client.post('/ussd', data={**form, 'sessionId': 'parity-asgi'})
+        assert_same(flask_response, asgi_response, text)
+    # A GET has no form, which both apps treat the same way
+    assert_same(flask_client.get('/ussd'), asgi_client.get('/ussd'))
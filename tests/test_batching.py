@@ -0,0 +1,52 @@
+# tests/test_batching.py
+#
+# MicroBatcher runs one predict over the rows of several requests. A request
+# that makes that predict raise must fail on its own; the requests batched
+# with it still get their predictions.
+
+import numpy as np
+import pytest
+
+from src.api.batching import MicroBatcher
+
+
+def predict(rows):
+    # Like CompiledForest: refuses the whole input when any row has a NaN
+    if np.isnan(rows).any():
+        raise ValueError("Input contains NaN or infinity")
+    return rows.sum(axis=1)
+
+
+@pytest.fixture
+def batcher():
+    # A long window so everything submitted below lands in one batch
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=200, name='test')
+    yield batcher
+    batcher.close()
+
+
+def test_rows_are_split_back_per_request(batcher):
+    blocks = [np.full((n, 3), float(n)) for n in (1, 2, 3)]
+    futures = [batcher.submit(block) for block in blocks]
+    for block, future in zip(blocks, futures):
+        np.testing.assert_array_equal(future.result(timeout=5), block.sum(axis=1))
+    assert batcher.stats()['batch_size_counts'] == {6: 1}
+
+
+def test_poisoned_request_fails_alone(batcher):
+    good = [np.ones((1, 3)), np.full((2, 3), 2.0), np.full((1, 3), 3.0)]
+    poisoned = np.array([[1.0, np.nan, 1.0]])
+    futures = [batcher.submit(rows) for rows in good[:2] + [poisoned] + good[2:]]
+    poisoned_future = futures.pop(2)
+
+    with pytest.raises(ValueError, match='NaN'):
+        poisoned_future.result(timeout=5)
+    for rows, future in zip(good, futures):
+        np.testing.assert_array_equal(future.result(timeout=5), rows.sum(axis=1))
+    assert batcher.stats()['failed_batches'] == 1
+
+
+def test_single_request_gets_its_own_error(batcher):
+    with pytest.raises(ValueError):
+        batcher.predict(np.array([[np.nan, 1.0, 1.0]]))
+    assert batcher.stats()['failed_batches'] == 1
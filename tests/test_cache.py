@@ -0,0 +1,44 @@
+# tests/test_cache.py
+
+import time
+
+import pytest
+
+from src.api.cache import CacheBackend, InProcessBackend
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_len_counts_only_live_entries(monkeypatch):
+    backend = InProcessBackend(maxsize=10, ttl=60)
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now)
+    backend.set('old', 1)
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 30)
+    backend.set('new', 2)
+    assert len(backend) == 2
+
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+    assert len(backend) == 1
+    assert backend.get('old') is None
+    assert backend.get('new') == 2
+
+
+def test_lru_eviction():
+    backend = InProcessBackend(maxsize=2, ttl=60)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    backend.get('a')
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == (1, 3)
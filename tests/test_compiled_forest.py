@@ -0,0 +1,49 @@
+# tests/test_compiled_forest.py
+#
+# CompiledForest must predict what the sklearn forest it was built from
+# predicts, on real preprocessed rows.
+
+import numpy as np
+import pytest
+
+from conftest import require_models
+from src.api.compiled_forest import CompiledForest
+from src.api.model_registry import get_model
+
+
+@pytest.fixture(scope='module')
+def X(sample):
+    return get_model('preprocessor').transform(sample)
+
+
+def test_regressor_matches_sklearn(X):
+    require_models('rf_regressor')
+    model = get_model('rf_regressor')
+    compiled = CompiledForest.from_sklearn(model)
+    assert np.allclose(compiled.predict(X), model.predict(X))
+    assert np.allclose(compiled.predict(X[:1]), model.predict(X[:1]))
+
+
+def test_classifier_matches_sklearn(X):
+    require_models('rf_classifier')
+    model = get_model('rf_classifier')
+    compiled = CompiledForest.from_sklearn(model)
+    assert np.allclose(compiled.predict_proba(X), model.predict_proba(X))
+    assert (compiled.predict(X) == model.predict(X)).all()
+    assert list(compiled.classes_) == list(model.classes_)
+
+
+def test_regressor_has_no_predict_proba(X):
+    require_models('rf_regressor')
+    with pytest.raises(AttributeError):
+        CompiledForest.from_sklearn(get_model('rf_regressor')).predict_proba(X[:1])
+
+
+@pytest.mark.parametrize('value', [np.nan, np.inf, -np.inf, 1e39])
+def test_non_finite_input_is_rejected(X, value):
+    require_models('rf_classifier')
+    compiled = CompiledForest.from_sklearn(get_model('rf_classifier'))
+    rows = np.array(X[:2], dtype=np.float64)
+    rows[1, 0] = value
+    with pytest.raises(ValueError):
+        compiled.predict(rows)
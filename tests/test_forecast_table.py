@@ -0,0 +1,100 @@
+# tests/test_forecast_table.py
+#
+# The forecast table is rebuilt (e.g. by a daily cron job) while the servers
+# keep running. Their next lookup must serve the new file, not the table they
+# loaded at import, and only rows made by the model bundle they run on.
+
+import csv
+import logging
+from datetime import datetime
+
+import pytest
+
+from conftest import require_dataset, require_models
+from src.api import model_registry
+from src.ussd.forecast_table import COLUMNS, ForecastTable, build_forecast_table
+
+logging.disable(logging.CRITICAL)
+
+DATE = datetime(2025, 3, 1)
+# English, check a hospital, first hospital, first department, type a date
+CHAIN = f"1*1*1*1*4*{DATE:%Y-%m-%d}"
+
+
+@pytest.fixture
+def ussd(tmp_path, monkeypatch):
+    require_models()
+    require_dataset()
+    from src.ussd import ussd_app
+
+    monkeypatch.setattr(ussd_app, 'FORECAST', ForecastTable(str(tmp_path / 'best_time_forecast.csv')))
+    return ussd_app
+
+
+def write_table(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def reply(ussd):
+    """The reply to CHAIN from the Flask app, in a new session each time."""
+    from src.api.app import app
+
+    client = app.test_client()
+    session_ids = iter(range(100))
+
+    def reply():
+        form = {'sessionId': f"forecast-{next(session_ids)}", 'phoneNumber': '+254700000000', 'text': CHAIN}
+        return client.post('/ussd', data=form).get_data(as_text=True)
+
+    return reply
+
+
+def sentinel_row(ussd, version):
+    return [ussd.HOSPITALS[0], ussd.DEPARTMENTS[0], f"{DATE:%Y-%m-%d}", 'Midnight', '7.00', 'Sentinel', version]
+
+
+def test_missing_table_is_empty(tmp_path):
+    table = ForecastTable(str(tmp_path / 'none.csv'))
+    assert len(table) == 0
+    assert table.get(('KNH', 'Emergency', '2025-03-01'), 'v1') is None
+
+
+def test_table_rebuilt_under_a_running_app(ussd, reply):
+    path = ussd.FORECAST.path
+
+    # No table yet: answered by the models
+    live = reply()
+    assert 'Time:' in live and f"{ussd.HOSPITALS[0]} - {ussd.DEPARTMENTS[0]}" in live
+
+    # A table written after the app started is served from the next hop on
+    write_table(path, [sentinel_row(ussd, model_registry.active().version)])
+    assert 'Time: Midnight' in reply()
+
+    # Rebuilding replaces the file again; its rows are the models' answers
+    assert build_forecast_table(DATE, 1, path) > 0
+    assert len(ussd.FORECAST) > 1
+    assert reply() == live
+
+
+def test_rows_from_another_model_version_are_not_served(ussd, reply, monkeypatch):
+    path = ussd.FORECAST.path
+    live = reply()
+
+    write_table(path, [sentinel_row(ussd, 'retired-version')])
+    assert reply() == live
+
+    # Rows for the serving version are used until a reload swaps in another bundle
+    write_table(path, [sentinel_row(ussd, model_registry.active().version)])
+    assert 'Time: Midnight' in reply()
+
+    bundle = model_registry.ModelBundle(model_registry.MODEL_DIR)
+    bundle._version = 'next-version'
+    monkeypatch.setattr(model_registry, '_active', bundle)
+    for hook in model_registry._reload_hooks:
+        hook()
+    assert ussd.FORECAST._stamp is None
+    assert reply() == live
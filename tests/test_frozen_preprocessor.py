@@ -0,0 +1,67 @@
+# tests/test_frozen_preprocessor.py
+#
+# FrozenPreprocessor must produce exactly what the fitted ColumnTransformer
+# produces, for every input shape the API accepts.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import require_models
+from src.api.frozen_preprocessor import FrozenPreprocessor
+from src.api.model_registry import get_model
+
+
+@pytest.fixture(scope='module')
+def preprocessor():
+    require_models('preprocessor')
+    return get_model('preprocessor')
+
+
+@pytest.fixture(scope='module')
+def frozen(preprocessor):
+    return FrozenPreprocessor.from_column_transformer(preprocessor)
+
+
+def test_dataframe(preprocessor, frozen, sample):
+    assert np.allclose(frozen.transform(sample), preprocessor.transform(sample))
+
+
+def test_dataframe_in_another_column_order(preprocessor, frozen, sample):
+    shuffled = sample[sample.columns[::-1]]
+    assert np.allclose(frozen.transform(shuffled), preprocessor.transform(sample))
+
+
+def test_list_rows(preprocessor, frozen, sample, records):
+    expected = preprocessor.transform(sample)
+    rows = [list(record.values()) for record in records]
+    assert np.allclose(frozen.transform(rows), expected)
+    for i in (0, len(rows) // 2, len(rows) - 1):
+        assert np.allclose(frozen.transform_row(rows[i]), expected[i:i + 1])
+
+
+def test_dict_rows(preprocessor, frozen, sample, records):
+    expected = preprocessor.transform(sample)
+    assert np.allclose(frozen.transform(records), expected)
+    # Key order doesn't matter
+    reordered = dict(reversed(list(records[0].items())))
+    assert np.allclose(frozen.transform_row(reordered), expected[:1])
+
+
+def test_unknown_category_encodes_as_zeros(preprocessor, frozen, records):
+    row = {**records[0], 'hospital_name': 'Nowhere General', 'department': 'Radiology'}
+    expected = preprocessor.transform(pd.DataFrame([row]))
+    out = frozen.transform_row(row)
+    assert np.allclose(out, expected)
+
+    encoder = preprocessor.named_transformers_['cat']
+    start = out.shape[1] - sum(len(categories) for categories in encoder.categories_)
+    hospitals = len(encoder.categories_[0])
+    departments = len(encoder.categories_[1])
+    assert not out[0, start:start + hospitals + departments].any()
+
+
+def test_empty_and_wrong_width(frozen, records):
+    assert frozen.transform([]).shape == (0, frozen.width)
+    with pytest.raises(ValueError):
+        frozen.transform_row(list(records[0].values())[:-1])
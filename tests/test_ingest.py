@@ -0,0 +1,54 @@
+# tests/test_ingest.py
+#
+# StreamedUpload keeps the last few selections of a large upload in memory.
+# That cache is bounded by bytes as well as by count, and a selection larger
+# than the whole budget is returned without being kept.
+
+import io
+
+import pytest
+
+from conftest import SEED
+from src.dashboard import ingest
+from src.dashboard.data_layer import DASHBOARD_COLUMNS
+from src.dashboard.ingest import StreamedUpload
+
+
+@pytest.fixture(scope='module')
+def upload():
+    from generate_dataset import iter_chunks
+
+    buffer = io.BytesIO()
+    next(iter_chunks(seed=SEED, chunk_days=14)).to_csv(buffer, index=False)
+    return StreamedUpload(buffer, DASHBOARD_COLUMNS, chunk_rows=200)
+
+
+def select_each_hospital(upload):
+    return [upload.select([hospital], upload.departments, upload.min_date, upload.max_date)
+            for hospital in upload.hospitals]
+
+
+def test_slices_stay_within_the_byte_budget(upload, monkeypatch):
+    largest = max(int(s.memory_usage(index=True, deep=True).sum()) for s in select_each_hospital(upload))
+
+    # Room for about two slices
+    monkeypatch.setattr(ingest, 'SLICE_CACHE_MB', 2.5 * largest / (1024 * 1024))
+    upload._slices.clear()
+    upload._slice_bytes = 0
+    select_each_hospital(upload)
+    assert 1 <= len(upload._slices) < len(upload.hospitals)
+    assert upload._slice_bytes == sum(nbytes for _, nbytes in upload._slices.values())
+    assert upload._slice_bytes <= ingest.SLICE_CACHE_MB * 1024 * 1024
+
+    # The oldest selections were evicted first
+    kept = [key[0] for key in upload._slices]
+    assert kept == [(hospital,) for hospital in upload.hospitals[-len(kept):]]
+
+
+def test_selection_over_budget_is_not_cached(upload, monkeypatch):
+    monkeypatch.setattr(ingest, 'SLICE_CACHE_MB', 0.001)
+    upload._slices.clear()
+    upload._slice_bytes = 0
+    everything = upload.select(upload.hospitals, upload.departments, upload.min_date, upload.max_date)
+    assert len(everything) > 0
+    assert len(upload._slices) == 0 and upload._slice_bytes == 0
@@ -0,0 +1,109 @@
+# tests/test_ussd_sessions.py
+#
+# The gateway sends the whole input chain on every hop, and with several
+# workers consecutive hops of one session can land on different processes.
+# Whichever process answers, the replies must be the ones a single process
+# would give.
+
+import logging
+import threading
+import time
+
+import pytest
+
+from conftest import require_dataset, require_models
+from src.api.cache import InProcessBackend
+from src.ussd import sessions
+from src.ussd.sessions import Session
+
+logging.disable(logging.CRITICAL)
+
+# English, check a hospital, first hospital, first department, today
+CHAIN = ['', '1', '1*1', '1*1*1', '1*1*1*1', '1*1*1*1*1']
+
+
+def test_new_inputs():
+    session = Session('s')
+    assert session.new_inputs('') == []
+    assert session.new_inputs('1*1*98') == ['1', '1', '98']
+    session.text = '1*1'
+    assert session.new_inputs('1*1') == []
+    assert session.new_inputs('1*1*3') == ['3']
+    assert session.new_inputs('1*1*98*3*0') == ['98', '3', '0']
+    assert session.new_inputs('2*1') is None
+    assert session.new_inputs('1*12') is None
+
+
+@pytest.fixture
+def ussd():
+    require_models()
+    require_dataset()
+    from src.ussd.ussd_app import handle_ussd
+
+    original = sessions.sessions.backend
+    yield handle_ussd
+    sessions.set_backend(original)
+
+
+def run(handle_ussd, session_id, hops):
+    """Replies to ``hops``, a list of (store, text); each store stands for one worker's sessions."""
+    replies = []
+    for store, text in hops:
+        sessions.set_backend(store)
+        replies.append(handle_ussd(session_id, '+254700000000', text))
+    return replies
+
+
+def test_chain_replayed_on_a_fresh_store(ussd):
+    single = InProcessBackend()
+    expected = run(ussd, 'single', [(single, text) for text in CHAIN])
+    assert expected[-1].startswith('END')
+    for i, text in enumerate(CHAIN):
+        assert run(ussd, f'fresh-{i}', [(InProcessBackend(), text)]) == [expected[i]]
+
+
+def test_hops_alternating_between_workers(ussd):
+    single = InProcessBackend()
+    expected = run(ussd, 'single', [(single, text) for text in CHAIN])
+
+    workers = [InProcessBackend(), InProcessBackend()]
+    alternating = run(ussd, 'alternating', [(workers[i % 2], text) for i, text in enumerate(CHAIN)])
+    assert alternating == expected
+
+    # One worker handles the first hops, the other joins late and then keeps the session
+    late = [workers[0]] * 2 + [workers[1]] * (len(CHAIN) - 2)
+    assert run(ussd, 'late', list(zip(late, CHAIN))) == expected
+
+
+def test_concurrent_hops_advance_once(ussd, monkeypatch):
+    from src.ussd import ussd_app
+
+    sessions.set_backend(InProcessBackend())
+    ussd('race', '+254700000000', '')
+    ussd('race', '+254700000000', '1')
+
+    # Widen the window between reading the session and saving it
+    advance = ussd_app.advance
+
+    def slow_advance(session, value):
+        time.sleep(0.05)
+        return advance(session, value)
+
+    monkeypatch.setattr(ussd_app, 'advance', slow_advance)
+
+    # A gateway retry racing the original hop must get the same reply, not a second step
+    barrier = threading.Barrier(8)
+    replies = []
+
+    def hop():
+        barrier.wait()
+        replies.append(ussd('race', '+254700000000', '1*1'))
+
+    threads = [threading.Thread(target=hop) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(replies)) == 1
+    assert sessions.sessions.get('race').screen == 'hospital'